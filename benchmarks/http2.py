@@ -0,0 +1,98 @@
+"""Benchmark HTTP/1.1 and HTTP/2 transports against a local h2c server.
+
+The mock iFunny application is served by hypercorn, which speaks both
+HTTP/1.1 and cleartext HTTP/2 (prior knowledge) on the same port. Every
+transport runs the same concurrent user_info workload. Requires the
+optional httpx[http2] and hypercorn packages.
+
+Example:
+
+python -m benchmarks.http2 --concurrency 64 --requests 2000 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.transport import HTTPXTransport, RequestsTransport
+
+from .mockserver import MockConfig, MockIFunny
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve_hypercorn(config: MockConfig, port: int):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    hconfig = Config()
+    hconfig.bind = [f"127.0.0.1:{port}"]
+    hconfig.h2_max_concurrent_streams = 1000
+    hconfig.accesslog = None
+    asyncio.run(serve(MockIFunny(config), hconfig, mode="wsgi"))
+
+
+def _wait_for(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("mock server did not start")
+
+
+def run(transport, base: str, concurrency: int, requests: int) -> float:
+    """Send concurrent user_info requests, returning requests per second."""
+
+    api = IFAPI("benchmark", base=base, transport=transport, coalesce=False)
+    api.user_info(user_id="warmup")
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda num: api.user_info(user_id=f"00000001{num:016x}"), range(requests)))
+        elapsed = time.perf_counter() - start
+    transport.close()
+    return requests / elapsed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare HTTP/1.1 and HTTP/2 transports.")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per transport")
+    parser.add_argument("--connections", type=int, default=4, help="HTTP/2 connections")
+    parser.add_argument("--latency", type=float, default=0.01, help="server delay per request")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="padding bytes per item")
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    config = MockConfig(payload_bytes=args.payload_bytes, latency=args.latency)
+    server = multiprocessing.Process(target=_serve_hypercorn, args=(config, port), daemon=True)
+    server.start()
+    try:
+        _wait_for(port)
+        base = f"http://127.0.0.1:{port}/v4"
+        transports = {
+            f"requests http/1.1 ({args.concurrency} conns)": RequestsTransport(pool_maxsize=args.concurrency),
+            f"httpx http/1.1 ({args.concurrency} conns)": HTTPXTransport(http2=False,
+                                                                         max_connections=args.concurrency),
+            f"httpx http/2 ({args.connections} conns)": HTTPXTransport(http1=False,
+                                                                       max_connections=args.connections)
+        }
+        for name, transport in transports.items():
+            print(f"{name:<32}{run(transport, base, args.concurrency, args.requests):>10.1f} req/s")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
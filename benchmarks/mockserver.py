@@ -0,0 +1,273 @@
+"""Local stub of the iFunny API for offline benchmarks.
+
+The server is a plain WSGI application, so it can be served by wsgiref
+(HTTP/1.1 keep-alive, see make_mock_server()) or any other WSGI server.
+Every endpoint in ifunnyapi.endpoints is implemented with deterministic
+fake data, cursor paging that follows iFunny's paging.cursors.next/hasNext
+layout and feeds that only advance once a post is marked read.
+
+Example:
+
+python -m benchmarks.mockserver --port 8080 --latency 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from ifunnyapi import endpoints
+
+MAX_PAGE = 100
+
+
+class MockConfig:
+    """Mock server behavior.
+
+    Attributes:
+        items: Number of items in every paged collection.
+        payload_bytes: Size of the padding string added to every item.
+        latency: Seconds each request is delayed.
+        jitter: Maximum extra random delay in seconds.
+    """
+
+    def __init__(self, items: int = 1000, payload_bytes: int = 256, latency: float = 0.0, jitter: float = 0.0):
+        self.items = items
+        self.payload_bytes = payload_bytes
+        self.latency = latency
+        self.jitter = jitter
+
+
+def _oid(kind: int, num: int) -> str:
+    return f"{kind:08x}{num:016x}"
+
+
+def _num(oid: str) -> int:
+    """Map any ID back to a small item number."""
+
+    try:
+        return int(oid[8:], 16) % 10 ** 6
+    except ValueError:
+        return zlib.crc32(oid.encode()) % 10 ** 6
+
+
+class MockIFunny:
+    """WSGI application implementing the iFunny endpoints."""
+
+    def __init__(self, config: MockConfig = None):
+        self.config = config or MockConfig()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._feed_pos: Dict[str, int] = {}
+        self._pad = "x" * self.config.payload_bytes
+        self._routes: List[Tuple[str, "re.Pattern", Callable, int]] = []
+        paged = {
+            endpoints.MY_ACTIVITY: ("news", self._news),
+            endpoints.MY_BLOCKED_USERS: ("users", self._user),
+            endpoints.MY_COMMENTS: ("comments", self._comment),
+            endpoints.USER_SUBSCRIBERS: ("users", self._user),
+            endpoints.USER_SUBSCRIPTIONS: ("users", self._user),
+            endpoints.USER_POSTS: ("content", self._post),
+            endpoints.USER_FEATURES: ("content", self._post),
+            endpoints.USER_GUESTS: ("guests", self._guest),
+            endpoints.CHANNEL_POSTS: ("content", self._post),
+            endpoints.SEARCH_POSTS: ("content", self._post),
+            endpoints.POST_COMMENTS: ("comments", self._comment),
+            endpoints.POST_SMILES_USERS: ("users", self._user),
+            endpoints.POST_REPUBS_USERS: ("users", self._user),
+            endpoints.COMMENT_REPLIES: ("replies", self._comment),
+        }
+        for template, (key, make) in paged.items():
+            self._route("GET", template, self._pager(key, make))
+        self._route("GET", endpoints.ACCOUNT, lambda req, *_: {"data": self._user(0)})
+        self._route("GET", endpoints.USERS, lambda req, uid: {"data": self._user(_num(uid))})
+        self._route("GET", endpoints.USER_BY_NICK, lambda req, nick: {"data": dict(self._user(len(nick)), nick=nick)})
+        self._route("GET", endpoints.POSTS, lambda req, pid: {"data": self._post(_num(pid))})
+        self._route("GET", endpoints.COMMENTS, lambda req, pid, cid: {"data": self._comment(_num(cid))})
+        self._route("GET", endpoints.CHANNELS, lambda req: {"data": {"channels": {"items": [
+            {"id": _oid(9, num), "title": f"channel {num}"} for num in range(9)
+        ]}}})
+        self._route("GET", endpoints.IS_NICK_AVAILABLE, lambda req: {"data": {"available": True}})
+        self._route("GET", endpoints.IS_EMAIL_AVAILABLE, lambda req: {"data": {"available": True}})
+        self._route("GET", endpoints.DIGEST_POSTS.replace("{}{:02d}{:02d}", "{}"), self._digest)
+        for template in (endpoints.FEATURED_FEED, endpoints.SUBSCRIPTIONS_FEED):
+            self._route("GET", template, self._feed(template, advance=False))
+        self._route("GET", endpoints.POPULAR_FEED, self._feed(endpoints.POPULAR_FEED, advance=True))
+        self._route("POST", endpoints.COLLECTIVE_FEED, self._feed(endpoints.COLLECTIVE_FEED, advance=True))
+        self._route("PUT", endpoints.READS, self._read)
+        self._route("POST", endpoints.UPLOAD, lambda req: {"data": {"id": _oid(7, 0), "state": "pending"}})
+        # Remaining endpoints are actions that only acknowledge the request
+        for method in ("PUT", "POST", "DELETE"):
+            for template in (
+                endpoints.REVOKE, endpoints.USER_SUBSCRIBERS, endpoints.BLOCK_USER, endpoints.REPORT_USER,
+                endpoints.REPORT_POST, endpoints.REPORT_COMMENT, endpoints.PIN_POST, endpoints.REPUBLISH_POST,
+                endpoints.SMILE_POST, endpoints.UNSMILE_POST, endpoints.SMILE_COMMENT, endpoints.UNSMILE_COMMENT,
+                endpoints.POST_COMMENTS, endpoints.COMMENT_REPLIES, endpoints.POSTS, endpoints.COMMENTS
+            ):
+                self._route(method, template, lambda req, *_: {"data": {}})
+        # Prefer routes with the most literal characters, e.g. /users/nicks_available over /users/{}
+        self._routes.sort(key=lambda route: -route[3])
+
+    def _route(self, method: str, template: str, handler: Callable):
+        regex = "".join(
+            "([^/]+)" if part.startswith("{") else re.escape(part)
+            for part in re.split(r"(\{[^}]*\})", template) if part
+        )
+        literal = len(re.sub(r"\{[^}]*\}", "", template))
+        self._routes.append((method, re.compile(regex + "$"), handler, literal))
+
+    def _user(self, num: int) -> dict:
+        return {"id": _oid(1, num), "nick": f"user{num}", "num": {"subscribers": num, "subscriptions": num % 50},
+                "about": self._pad}
+
+    def _post(self, num: int) -> dict:
+        return {"id": _oid(2, num), "type": "pic", "url": f"https://img.ifunny.co/images/{num}.jpg",
+                "tags": ["meme", f"tag{num % 10}"], "date_create": 1600000000 + num,
+                "creator": {"id": _oid(1, num % 997), "nick": f"user{num % 997}"},
+                "num": {"smiles": num, "comments": num % 30}, "description": self._pad}
+
+    def _comment(self, num: int) -> dict:
+        return {"id": _oid(3, num), "cid": _oid(2, num % 997), "text": self._pad, "date": 1600000000 + num,
+                "user": {"id": _oid(1, num % 997), "nick": f"user{num % 997}"}}
+
+    def _news(self, num: int) -> dict:
+        return {"type": "smile", "date": 1600000000 + num, "user": self._user(num), "content": self._post(num)}
+
+    def _guest(self, num: int) -> dict:
+        return {"visit_timestamp": 1600000000 + num, "user": self._user(num)}
+
+    def _pager(self, key: str, make: Callable[[int], dict]) -> Callable:
+        def handler(req: dict, *_) -> dict:
+            limit = min(int(req["params"].get("limit", 30)), MAX_PAGE)
+            start = int(req["params"].get("next") or 0)
+            stop = min(start + limit, self.config.items)
+            has_next = stop < self.config.items
+            return {"data": {key: {
+                "items": [make(num) for num in range(start, stop)],
+                "paging": {
+                    "cursors": {"next": str(stop) if has_next else None, "prev": str(start) if start else None},
+                    "hasNext": has_next,
+                    "hasPrev": start > 0
+                }
+            }}}
+        return handler
+
+    def _feed(self, template: str, advance: bool) -> Callable:
+        def handler(req: dict) -> dict:
+            with self._lock:
+                pos = self._feed_pos.get(template, 0)
+                if advance:
+                    self._feed_pos[template] = pos + 1
+            return {"data": {"content": {"items": [self._post(pos)]}}}
+        return handler
+
+    def _read(self, req: dict, post_id: str) -> dict:
+        feed = endpoints.FEATURED_FEED if req["params"].get("from") == "feat" else endpoints.SUBSCRIPTIONS_FEED
+        with self._lock:
+            self._feed_pos[feed] = self._feed_pos.get(feed, 0) + 1
+        return {"data": {}}
+
+    def _digest(self, req: dict, date: str) -> dict:
+        seed = int(date) if date.isdigit() else 0
+        return {"data": {"items": [self._post(seed % 10 ** 6 + num) for num in range(min(self.config.items, 50))]}}
+
+    def dispatch(self, method: str, path: str, params: Dict[str, str]) -> Tuple[int, dict]:
+        """Route a request, returning status and JSON response."""
+
+        if path.startswith("/v4"):
+            path = path[3:]
+        for rmethod, regex, handler, _ in self._routes:
+            if rmethod == method:
+                match = regex.match(path)
+                if match:
+                    retv = handler({"params": params}, *match.groups())
+                    retv.setdefault("status", 200)
+                    return 200, retv
+        return 404, {"error": "not_found", "error_description": f"{method} {path} not found", "status": 404}
+
+    def __call__(self, environ: dict, start_response: Callable):
+        with self._lock:
+            self.requests += 1
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        if length:
+            environ["wsgi.input"].read(length)
+        params = {key: vals[-1] for key, vals in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        delay = self.config.latency + random.random() * self.config.jitter
+        if delay:
+            time.sleep(delay)
+        status, retv = self.dispatch(environ["REQUEST_METHOD"], environ["PATH_INFO"], params)
+        body = json.dumps(retv, separators=(",", ":")).encode()
+        start_response(f"{status} {'OK' if status == 200 else 'Not Found'}", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body)))
+        ])
+        return [body]
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+
+def make_mock_server(host: str = "127.0.0.1", port: int = 0, config: MockConfig = None):
+    """Create a threaded HTTP/1.1 keep-alive mock server.
+
+    Returns:
+        wsgiref server; its server_port holds the bound port.
+    """
+
+    return make_server(host, port, MockIFunny(config), server_class=_ThreadingWSGIServer,
+                       handler_class=_KeepAliveHandler)
+
+
+def serve_in_thread(config: MockConfig = None) -> Tuple[object, str]:
+    """Start a mock server in a daemon thread.
+
+    Returns:
+        Tuple of the server and the API base URL to pass to IFAPI.
+    """
+
+    server = make_mock_server(config=config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v4"
+
+
+def serve_in_process(config: MockConfig = None, ready=None):
+    """Serve forever, putting the API base URL on the ready queue once bound."""
+
+    server = make_mock_server(config=config)
+    if ready is not None:
+        ready.put(f"http://127.0.0.1:{server.server_port}/v4")
+    server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve a local mock iFunny API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--items", type=int, default=1000, help="items per paged collection")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="padding bytes per item")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of delay per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum extra random delay")
+    args = parser.parse_args(argv)
+    config = MockConfig(args.items, args.payload_bytes, args.latency, args.jitter)
+    server = make_mock_server(args.host, args.port, config)
+    print(f"serving mock iFunny API on http://{args.host}:{server.server_port}/v4")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Profile ifunnyapi client overhead by replaying recorded responses.
+
+The record command runs the suite benchmarks through a RecordingTransport
+and saves every response to a cassette, against the mock server by default
+or against any base URL. The profile command replays the cassette in
+process, with no network and no server, under cProfile and tracemalloc, so
+the reported cost is the client's own paging, decoding and checking.
+
+Example:
+
+python -m benchmarks.replay record workload.ifc --items 5000
+python -m benchmarks.replay profile workload.ifc --repeat 5 --top 30
+"""
+
+import argparse
+import cProfile
+import multiprocessing
+import pstats
+import sys
+import time
+import tracemalloc
+from typing import List, Optional
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.transport import RecordingTransport, ReplayTransport, RequestsTransport
+
+from .mockserver import MockConfig, serve_in_process
+from .suite import BENCHMARKS
+
+
+def _workload_args(args: argparse.Namespace) -> argparse.Namespace:
+    """Benchmark arguments, which must match between record and replay."""
+
+    return argparse.Namespace(items=args.items, feed=args.feed, actions=args.actions, uploads=args.uploads)
+
+
+def record(args: argparse.Namespace):
+    server = None
+    base = args.base
+    if base is None:
+        config = MockConfig(args.items, args.payload_bytes)
+        ready = multiprocessing.Queue()
+        server = multiprocessing.Process(target=serve_in_process, args=(config, ready), daemon=True)
+        server.start()
+        base = ready.get(timeout=30)
+    transport = RecordingTransport(RequestsTransport(), args.cassette)
+    try:
+        api = IFAPI(args.token, base=base, transport=transport, coalesce=False)
+        for name in args.only or BENCHMARKS:
+            items = BENCHMARKS[name](api, _workload_args(args))
+            print(f"{name:<14}{items:>8} items")
+    finally:
+        transport.close()
+        if server is not None:
+            server.terminate()
+    print(f"recorded {transport.records} responses to {args.cassette}")
+
+
+def _run(args: argparse.Namespace, transport: ReplayTransport) -> int:
+    api = IFAPI("replay", transport=transport, coalesce=False)
+    items = 0
+    for _ in range(args.repeat):
+        for name in args.only or BENCHMARKS:
+            items += BENCHMARKS[name](api, _workload_args(args))
+    return items
+
+
+def profile(args: argparse.Namespace):
+    transport = ReplayTransport(args.cassette, latency=args.latency)
+    print(f"loaded {len(transport)} responses from {args.cassette}")
+
+    start = time.perf_counter()
+    items = _run(args, transport)
+    elapsed = time.perf_counter() - start
+    print(f"{transport.requests} requests, {items} items in {elapsed:.3f}s: "
+          f"{transport.requests / elapsed:.0f} req/s, {items / elapsed:.0f} items/s")
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _run(args, transport)
+    profiler.disable()
+    pstats.Stats(profiler).strip_dirs().sort_stats(args.sort).print_stats(args.top)
+
+    tracemalloc.start(10)
+    _run(args, transport)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"peak traced memory {peak / 1024:.1f} KiB, top allocation sites:")
+    for stat in snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]) \
+            .statistics("lineno")[:args.top]:
+        print(f"  {stat}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record and profile ifunnyapi workloads offline.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    workload = argparse.ArgumentParser(add_help=False)
+    workload.add_argument("cassette", help="cassette file path")
+    workload.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    workload.add_argument("--items", type=int, default=2000, help="items per paged collection")
+    workload.add_argument("--feed", type=int, default=200, help="featured posts to read")
+    workload.add_argument("--actions", type=int, default=500, help="posts to smile")
+    workload.add_argument("--uploads", type=int, default=50, help="images to upload")
+
+    rec = commands.add_parser("record", parents=[workload], help="record a workload to a cassette")
+    rec.add_argument("--payload-bytes", type=int, default=256, help="padding bytes per mock item")
+    rec.add_argument("--base", help="API base URL to record, defaults to a local mock server")
+    rec.add_argument("--token", default="benchmark", help="bearer token sent to --base")
+    rec.set_defaults(func=record)
+
+    prof = commands.add_parser("profile", parents=[workload], help="replay a cassette under the profilers")
+    prof.add_argument("--repeat", type=int, default=3, help="workload repetitions per measurement")
+    prof.add_argument("--latency", type=float, default=0.0, help="simulated seconds per response")
+    prof.add_argument("--sort", default="cumulative", help="pstats sort key")
+    prof.add_argument("--top", type=int, default=25, help="number of functions and allocation sites shown")
+    prof.set_defaults(func=profile)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
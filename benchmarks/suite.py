@@ -0,0 +1,181 @@
+"""Offline ifunnyapi benchmark suite against the local mock server.
+
+Every benchmark is run once for timing and once under tracemalloc for peak
+memory. The mock server runs in a separate process so that its CPU and
+memory use do not pollute client measurements. Results are written to
+benchmarks/results/ and compared with the previous run.
+
+Example:
+
+python -m benchmarks.suite --latency 0.005 --items 2000
+python -m benchmarks.suite --only paging feed --compare
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.metrics import MetricsCollector
+
+from .mockserver import MockConfig, serve_in_process
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def bench_paging(api: IFAPI, args: argparse.Namespace) -> int:
+    """Page through a whole collection with limit=None."""
+
+    return len(api.user_posts(user_id="0000000100000000000000ff"))
+
+
+def bench_paging_limit(api: IFAPI, args: argparse.Namespace) -> int:
+    """Page through a collection with a limit that is not a page multiple."""
+
+    return len(api.post_comments(post_id="0000000200000000000000ff", limit=args.items // 2 + 50))
+
+
+def bench_feed(api: IFAPI, args: argparse.Namespace) -> int:
+    """Read featured posts one at a time, marking each as read."""
+
+    return sum(1 for _ in api.featured(limit=args.feed))
+
+
+def bench_bulk_actions(api: IFAPI, args: argparse.Namespace) -> int:
+    """Smile a batch of posts."""
+
+    for num in range(args.actions):
+        api.smile_post(post_id=f"00000002{num:016x}")
+    return args.actions
+
+
+def bench_upload(api: IFAPI, args: argparse.Namespace) -> int:
+    """Upload generated PNG images."""
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (256, 256), (200, 30, 30)).save(buffer, "PNG")
+    media = buffer.getvalue()
+    for _ in range(args.uploads):
+        api.upload(media, description="benchmark", tags=["bench"])
+    return args.uploads
+
+
+BENCHMARKS: Dict[str, Callable[[IFAPI, argparse.Namespace], int]] = {
+    "paging": bench_paging,
+    "paging_limit": bench_paging_limit,
+    "feed": bench_feed,
+    "bulk_actions": bench_bulk_actions,
+    "upload": bench_upload
+}
+
+
+def run_benchmark(name: str, base: str, args: argparse.Namespace) -> dict:
+    """Run one benchmark for timing, then again for peak memory."""
+
+    func = BENCHMARKS[name]
+    metrics = MetricsCollector()
+    api = IFAPI("benchmark", hooks=[metrics], base=base)
+    start = time.perf_counter()
+    items = func(api, args)
+    elapsed = time.perf_counter() - start
+    requests = sum(endpoint["requests"] for endpoint in metrics.snapshot().values())
+
+    tracemalloc.start()
+    func(IFAPI("benchmark", base=base), args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "items": items,
+        "requests": requests,
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "items_per_second": items / elapsed,
+        "requests_per_item": requests / items if items else 0.0,
+        "peak_memory_bytes": peak
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(RESULTS_DIR)).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _previous_result(exclude: str) -> Optional[dict]:
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    names = sorted(name for name in os.listdir(RESULTS_DIR) if name.endswith(".json") and name != exclude)
+    if not names:
+        return None
+    with open(os.path.join(RESULTS_DIR, names[-1])) as file:
+        return json.load(file)
+
+
+def _print_results(results: dict, previous: Optional[dict]):
+    header = f"{'benchmark':<14}{'req/s':>10}{'items/s':>12}{'req/item':>10}{'peak KiB':>10}"
+    print(header)
+    for name, bench in results["benchmarks"].items():
+        line = (f"{name:<14}{bench['requests_per_second']:>10.1f}{bench['items_per_second']:>12.1f}"
+                f"{bench['requests_per_item']:>10.3f}{bench['peak_memory_bytes'] / 1024:>10.1f}")
+        old = previous["benchmarks"].get(name) if previous else None
+        if old:
+            line += (f"   items/s {bench['items_per_second'] / old['items_per_second'] - 1:+.1%}"
+                     f", peak {bench['peak_memory_bytes'] / old['peak_memory_bytes'] - 1:+.1%}")
+        print(line)
+    if previous:
+        print(f"compared with {previous['timestamp']} ({previous.get('revision')})")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run ifunnyapi benchmarks against a local mock server.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--items", type=int, default=2000, help="items per paged collection")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="padding bytes per item")
+    parser.add_argument("--latency", type=float, default=0.0, help="server delay per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum extra random server delay")
+    parser.add_argument("--feed", type=int, default=200, help="featured posts to read")
+    parser.add_argument("--actions", type=int, default=500, help="posts to smile")
+    parser.add_argument("--uploads", type=int, default=50, help="images to upload")
+    parser.add_argument("--compare", action="store_true", help="compare with the previous stored run")
+    parser.add_argument("--no-save", action="store_true", help="do not store results")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.items, args.payload_bytes, args.latency, args.jitter)
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_in_process, args=(config, ready), daemon=True)
+    server.start()
+    try:
+        base = ready.get(timeout=30)
+        results = {
+            "timestamp": time.strftime("%Y%m%dT%H%M%S"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("compare", "no_save", "only")},
+            "benchmarks": {name: run_benchmark(name, base, args) for name in args.only or BENCHMARKS}
+        }
+    finally:
+        server.terminate()
+
+    filename = results["timestamp"] + ".json"
+    _print_results(results, _previous_result(filename) if args.compare else None)
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(os.path.join(RESULTS_DIR, filename), "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,14 +10,19 @@ for feat in api.featured(limit=1):
     api.comment("nice feature!", post_id=feat["id"])
 """
 
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
 import io
 import json
-from typing import Generator, List, Union
+import logging
+import time
+from typing import Any, Callable, Dict, Generator, Iterable, List, NamedTuple, Optional, Tuple, Union
 
 from PIL import Image, UnidentifiedImageError
-import requests
 
 from .auth import AuthBearer
+from .cache import DiskCache
 from .endpoints import (
     BASE,
     ACCOUNT,
@@ -62,32 +67,130 @@ from .endpoints import (
     IS_EMAIL_AVAILABLE
 )
 from .enums import IFChannel, IFPostVisibility, IFReportType
-from .utils import api_request
+from .exceptions import DeadlineExceeded
+from .metrics import RequestEvent, endpoint_template
+from .store import IFStore
+from .transport import TRANSPORT_ERRORS, RequestsTransport
+from .utils import Deadline, PagingStats, SingleFlight, freeze, raise_for_error
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100  # Maximum paging limit accepted by iFunny
+DIGEST_WEEKDAY = 5  # Weekly digests are dated on Saturdays (date.weekday())
+
+
+class BulkResult(NamedTuple):
+    """Outcome of a bulk read, both mappings keyed by requested key."""
+
+    results: "OrderedDict[str, Any]"
+    errors: Dict[str, Exception]
+
+
+class PagingItems(list):
+    """List of paging items that records where paging stopped.
+
+    Attributes:
+        cursor: Cursor from which to resume paging (pass as cursor=...),
+            None if the last page was reached.
+        interrupted: True if a deadline stopped paging early.
+    """
+
+    cursor: Optional[str] = None
+    interrupted: bool = False
 
 
 class _IFBaseAPI:
     """Private API class, only interacts with iFunny API endpoints"""
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, store: IFStore = None, hooks: Iterable[Callable[[RequestEvent], None]] = None,
+                 base: str = BASE, coalesce: bool = True, transport=None):
         self.token = token
+        self.base = base
+        self.transport = transport if transport is not None else RequestsTransport()
         self.auth = AuthBearer(self.token)
+        self.store = store
+        self.hooks = list(hooks or [])
+        self.coalesce = coalesce
+        self.flights = SingleFlight()
+        self.paging_stats = PagingStats()
 
-    @api_request
-    def _get(self, path: str, **kwargs) -> dict:
+    def _request(self, method: str, path: str, deadline: Deadline = None, **kwargs) -> dict:
+        """Request with authorization, reporting a RequestEvent to hooks.
+
+        Args:
+            method: HTTP method.
+            path: iFunny API endpoint path.
+            deadline: Operation deadline limiting the request timeout.
+            **kwargs: Arbitrary keyword arguments passed to the transport.
+
+        Returns:
+            JSON dictionary of request output.
+
+        Raises:
+            DeadlineExceeded: Deadline expired or was cancelled before the
+                request was sent, or the request timed out at the deadline.
+        """
+
+        if deadline is not None:
+            deadline.check()
+            kwargs["timeout"] = deadline.timeout(kwargs.get("timeout"))
+        status = bytes_in = bytes_out = 0
+        error = None
+        start = time.perf_counter()
+        try:
+            req = self.transport.request(method, self.base + path, auth=self.auth, **kwargs)
+            status = req.status_code
+            bytes_in = len(req.content)
+            bytes_out = req.bytes_out
+            return raise_for_error(req.json())
+        except Exception as exc:
+            error = type(exc).__name__
+            if deadline is not None and deadline.expired and isinstance(exc, TRANSPORT_ERRORS):
+                raise DeadlineExceeded(deadline.cancelled) from exc
+            raise
+        finally:
+            if self.hooks:
+                event = RequestEvent(method, endpoint_template(path), path, status,
+                                     time.perf_counter() - start, bytes_in, bytes_out, error)
+                for hook in self.hooks:
+                    # A failing hook must not replace the request outcome
+                    try:
+                        hook(event)
+                    except Exception:
+                        logger.exception("request hook %r failed", hook)
+
+    def _get(self, path: str, deadline: Deadline = None, coalesce: bool = False, **kwargs) -> dict:
         """GET request with authorization.
 
         Args:
             path: iFunny API endpoint path.
+            deadline: Operation deadline limiting the request timeout.
+            coalesce: Share one request between concurrent identical GETs,
+                if enabled for the client. Only for idempotent lookups, never
+                for stateful endpoints such as feeds.
             **kwargs: Arbitrary keyword arguments passed to request.
 
         Returns:
-            JSON dictionary of request output.
+            JSON dictionary of request output. Coalesced GETs share the same
+            dictionary, which must not be mutated.
         """
 
-        req = requests.get(BASE + path, auth=self.auth, **kwargs)
-        return req.json()
+        if coalesce and self.coalesce:
+            try:
+                key = (self.token, path, freeze(kwargs))
+            except TypeError:
+                pass
+            else:
+                while True:
+                    try:
+                        return self.flights.do(key, lambda: self._request("GET", path, deadline, **kwargs),
+                                               deadline.remaining() if deadline is not None else None)
+                    except DeadlineExceeded:
+                        if deadline is not None and deadline.expired:
+                            raise
+                        # The shared call ran out of its leader's budget, not ours
+        return self._request("GET", path, deadline, **kwargs)
 
-    @api_request
     def _post(self, path: str, **kwargs) -> dict:
         """POST request with authorization.
 
@@ -99,10 +202,8 @@ class _IFBaseAPI:
             JSON dictionary of request output.
         """
 
-        req = requests.post(BASE + path, auth=self.auth, **kwargs)
-        return req.json()
+        return self._request("POST", path, **kwargs)
 
-    @api_request
     def _put(self, path: str, **kwargs) -> dict:
         """PUT request with authorization.
 
@@ -114,10 +215,8 @@ class _IFBaseAPI:
             JSON dictionary of request output.
         """
 
-        req = requests.put(BASE + path, auth=self.auth, **kwargs)
-        return req.json()
+        return self._request("PUT", path, **kwargs)
 
-    @api_request
     def _delete(self, path: str, **kwargs) -> dict:
         """DELETE request with authorization.
 
@@ -129,8 +228,7 @@ class _IFBaseAPI:
             JSON dictionary of request output.
         """
 
-        req = requests.delete(BASE + path, auth=self.auth, **kwargs)
-        return req.json()
+        return self._request("DELETE", path, **kwargs)
 
     def revoke(self, **kwargs):
         """Revoke the iFunny bearer token in use.
@@ -162,10 +260,19 @@ class _IFBaseAPI:
             **kwargs: Arbitrary keyword arguments passed to requests.
 
         Returns:
-            JSON dictionary of iFunny user.
+            JSON dictionary of iFunny user. Concurrent identical calls may share
+            one request and return the same dictionary, which must not be
+            mutated.
         """
 
-        return self._get(USERS.format(user_id), **kwargs)["data"]
+        if self.store is not None:
+            user = self.store.user(user_id)
+            if user is not None:
+                return user
+        user = self._get(USERS.format(user_id), coalesce=True, **kwargs)["data"]
+        if self.store is not None:
+            self.store.upsert_users([user])
+        return user
 
     def post_info(self, *, post_id: str, **kwargs) -> dict:
         """Retrieve iFunny post.
@@ -175,10 +282,19 @@ class _IFBaseAPI:
             **kwargs: Arbitrary keyword arguments passed to requests.
 
         Returns:
-            JSON dictionary of iFunny post.
+            JSON dictionary of iFunny post. Concurrent identical calls may share
+            one request and return the same dictionary, which must not be
+            mutated.
         """
 
-        return self._get(POSTS.format(post_id), **kwargs)["data"]
+        if self.store is not None:
+            post = self.store.post(post_id)
+            if post is not None:
+                return post
+        post = self._get(POSTS.format(post_id), coalesce=True, **kwargs)["data"]
+        if self.store is not None:
+            self.store.upsert_posts([post])
+        return post
 
     def comment_info(self, *, post_id: str, comment_id: str, **kwargs) -> dict:
         """Retrieve iFunny comment.
@@ -192,7 +308,14 @@ class _IFBaseAPI:
             JSON dictionary of iFunny comment.
         """
 
-        return self._get(COMMENTS.format(post_id, comment_id), **kwargs)["data"]
+        if self.store is not None:
+            comment = self.store.comment(comment_id)
+            if comment is not None:
+                return comment
+        comment = self._get(COMMENTS.format(post_id, comment_id), **kwargs)["data"]
+        if self.store is not None:
+            self.store.upsert_comments([comment], post_id)
+        return comment
 
     def channels_info(self, **kwargs) -> List[dict]:
         """Retrieve iFunny channels.
@@ -206,50 +329,98 @@ class _IFBaseAPI:
 
         return self._get(CHANNELS, **kwargs)["data"]["channels"]["items"]
 
-    def _get_paging_items(self, path: str, key: str, limit: int = None, **kwargs) -> List[dict]:
-        """Retrieve paging content from iFunny API.
+    def _get_paging_page(self, path: str, key: str, cursor: str = None, limit: int = PAGE_SIZE,
+                         params: dict = None, **kwargs) -> Tuple[List[dict], Optional[str]]:
+        """Retrieve one page of paging content from iFunny API.
 
         Args:
             path: iFunny API endpoint path.
             key: Response JSON dictionary key that contains requested paging
                 items.
+            cursor: Paging cursor from which to start, None for first page.
             limit: Number of paging items to retrieve.
+            params: Additional query parameters.
             **kwargs: Arbitrary keyword arguments passed to requests.
 
         Returns:
-            List of JSON dictionaries of paging items.
+            Tuple of list of JSON dictionaries of paging items and the next
+            cursor, None if there is no next page.
         """
 
-        def get_next(jso: dict) -> int:
-            return jso["data"][key]["paging"]["cursors"]["next"]
+        params = dict(params or {}, limit=limit)
+        if cursor is not None:
+            params["next"] = cursor
+        jso = self._get(path, params=params, **kwargs)["data"][key]
+        paging = jso["paging"]
+        self.paging_stats.record(len(jso["items"]))
+        return jso["items"], paging["cursors"]["next"] if paging["hasNext"] else None
 
-        def has_next(jso: dict) -> bool:
-            return jso["data"][key]["paging"]["hasNext"]
+    def _iter_paging_pages(self, path: str, key: str, limit: int = None, params: dict = None,
+                           page_size: int = PAGE_SIZE, cursor: str = None,
+                           **kwargs) -> Generator[Tuple[List[dict], Optional[str]], None, None]:
+        """Retrieve paging content from iFunny API page by page.
 
-        def get_items(jso: dict) -> list:
-            return jso["data"][key]["items"]
+        Requests stop as soon as the limit is reached or iFunny reports no
+        next page, and no cursor is ever requested twice.
+
+        Args:
+            path: iFunny API endpoint path.
+            key: Response JSON dictionary key that contains requested paging
+                items.
+            limit: Number of paging items to retrieve.
+            params: Additional query parameters.
+            page_size: Number of paging items per request, at most PAGE_SIZE.
+            cursor: Paging cursor from which to resume, None for first page.
+            **kwargs: Arbitrary keyword arguments passed to requests.
 
-        lnone = limit is None
-        ilim = 100 if lnone or limit > 100 else limit
-        val = rem = 0
-        batch = self._get(path, params={"limit": ilim}, **kwargs)
-        items = get_items(batch)
+        Returns:
+            Generator of tuples of list of JSON dictionaries of paging items
+            and the cursor of the next page, None after the last page.
+        """
 
-        if not lnone and limit <= 100:
-            return items
-        if not lnone:
-            val, rem = divmod(limit - 100, 100)
-        lbuffer = 0  # Significant only when limit is not None
+        page_size = max(1, min(page_size, PAGE_SIZE))
+        remaining = limit
+        fetched = set()
+        while remaining is None or remaining > 0:
+            fetched.add(cursor)
+            size = page_size if remaining is None else min(page_size, remaining)
+            items, cursor = self._get_paging_page(path, key, cursor, size, params, **kwargs)
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            if self.store is not None and key == "content":
+                self.store.upsert_posts(items)
+            yield items, cursor
+            if cursor is None or cursor in fetched:
+                return
+
+    def _get_paging_items(self, path: str, key: str, limit: int = None, params: dict = None,
+                          cursor: str = None, **kwargs) -> PagingItems:
+        """Retrieve paging content from iFunny API.
 
-        while has_next(batch) if lnone else lbuffer in range(val):
-            lbuffer += 1
-            batch = self._get(path, params={"limit": 100, "next": get_next(batch)}, **kwargs)
-            items.extend(get_items(batch))
-        if lnone:
-            batch = self._get(path, params={"limit": 100, "next": get_next(batch)}, **kwargs)
-        else:
-            batch = self._get(path, params={"limit": rem}, **kwargs)
-        items.extend(get_items(batch))
+        Args:
+            path: iFunny API endpoint path.
+            key: Response JSON dictionary key that contains requested paging
+                items.
+            limit: Number of paging items to retrieve.
+            params: Additional query parameters.
+            cursor: Paging cursor from which to resume, None for first page.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            List of JSON dictionaries of paging items. If a deadline passed
+            in kwargs expires, the items retrieved so far are returned with
+            interrupted set and cursor pointing at the next page.
+        """
+
+        items = PagingItems()
+        items.cursor = cursor
+        try:
+            for page, next_cursor in self._iter_paging_pages(path, key, limit, params, cursor=cursor, **kwargs):
+                items.extend(page)
+                items.cursor = next_cursor
+        except DeadlineExceeded:
+            items.interrupted = True
         return items
 
     def my_activity(self, limit: int = None, **kwargs) -> List[dict]:
@@ -276,7 +447,10 @@ class _IFBaseAPI:
             List of JSON dictionaries of iFunny account comments.
         """
 
-        return self._get_paging_items(MY_COMMENTS, "comments", limit, **kwargs)
+        comments = self._get_paging_items(MY_COMMENTS, "comments", limit, **kwargs)
+        if self.store is not None:
+            self.store.upsert_comments(comments)
+        return comments
 
     def my_blocked_users(self, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny blocked users.
@@ -303,7 +477,10 @@ class _IFBaseAPI:
             List of JSON dictionaries of iFunny user subscribers.
         """
 
-        return self._get_paging_items(USER_SUBSCRIBERS.format(user_id), "users", limit, **kwargs)
+        users = self._get_paging_items(USER_SUBSCRIBERS.format(user_id), "users", limit, **kwargs)
+        if self.store is not None:
+            self.store.add_subscribers(user_id, users)
+        return users
 
     def user_subscriptions(self, *, user_id: str, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny user subscriptions.
@@ -317,7 +494,10 @@ class _IFBaseAPI:
             List of JSON dictionaries of iFunny user subscriptions.
         """
 
-        return self._get_paging_items(USER_SUBSCRIPTIONS.format(user_id), "users", limit, **kwargs)
+        users = self._get_paging_items(USER_SUBSCRIPTIONS.format(user_id), "users", limit, **kwargs)
+        if self.store is not None:
+            self.store.add_subscriptions(user_id, users)
+        return users
 
     def user_posts(self, *, user_id: str, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny user posts.
@@ -387,8 +567,7 @@ class _IFBaseAPI:
             List of JSON dictionaries of iFunny posts with specified hashtag.
         """
 
-        return self._get_paging_items(SEARCH_POSTS, "content",
-                                      limit, params={"counters": "content", "tag": tag}, **kwargs)
+        return self._get_paging_items(SEARCH_POSTS, "content", limit, {"counters": "content", "tag": tag}, **kwargs)
 
     def post_comments(self, *, post_id: str, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny comments on specified post.
@@ -402,7 +581,10 @@ class _IFBaseAPI:
             List of JSON dictionaries of iFunny comments on specified post.
         """
 
-        return self._get_paging_items(POST_COMMENTS.format(post_id), "comments", limit, **kwargs)
+        comments = self._get_paging_items(POST_COMMENTS.format(post_id), "comments", limit, **kwargs)
+        if self.store is not None:
+            self.store.upsert_comments(comments, post_id)
+        return comments
 
     def post_smiles_users(self, *, post_id: str, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny users that smiled specified post.
@@ -417,7 +599,10 @@ class _IFBaseAPI:
             post.
         """
 
-        return self._get_paging_items(POST_SMILES_USERS.format(post_id), "users", limit, **kwargs)
+        users = self._get_paging_items(POST_SMILES_USERS.format(post_id), "users", limit, **kwargs)
+        if self.store is not None:
+            self.store.add_smiles(post_id, users)
+        return users
 
     def post_repubs_users(self, *, post_id: str, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny users that republished specified post.
@@ -432,7 +617,10 @@ class _IFBaseAPI:
             specified post.
         """
 
-        return self._get_paging_items(POST_REPUBS_USERS.format(post_id), "users", limit, **kwargs)
+        users = self._get_paging_items(POST_REPUBS_USERS.format(post_id), "users", limit, **kwargs)
+        if self.store is not None:
+            self.store.add_repubs(post_id, users)
+        return users
 
     def comment_replies(self, *, post_id: str, comment_id: str, limit: int = None, **kwargs) -> List[dict]:
         """Retrieve iFunny replies to specified comment.
@@ -448,7 +636,10 @@ class _IFBaseAPI:
             List of JSON dictionaries of iFunny replies to specified comment.
         """
 
-        return self._get_paging_items(COMMENT_REPLIES.format(post_id, comment_id), "replies", limit, **kwargs)
+        replies = self._get_paging_items(COMMENT_REPLIES.format(post_id, comment_id), "replies", limit, **kwargs)
+        if self.store is not None:
+            self.store.upsert_comments(replies, post_id)
+        return replies
 
     def _get_feed(self, path: str, limit: int = None, **kwargs) -> Generator[dict, None, None]:
         """Retrieve iFunny featured posts.
@@ -463,7 +654,10 @@ class _IFBaseAPI:
         """
         iterator = iter(int, 1) if limit is None else range(limit)
         for _ in iterator:
-            jso = self._get(path, params={"limit": 1}, **kwargs)
+            try:
+                jso = self._get(path, params={"limit": 1}, **kwargs)
+            except DeadlineExceeded:
+                return
             fitem = jso["data"]["content"]["items"][0]
             yield fitem
 
@@ -482,7 +676,11 @@ class _IFBaseAPI:
 
         for feat in self._get_feed(FEATURED_FEED, limit, **kwargs):
             if read:
-                self._put(READS.format(feat["id"]), params={"from": "feat"}, headers={"User-Agent": "*"}, **kwargs)
+                try:
+                    self._put(READS.format(feat["id"]), params={"from": "feat"}, headers={"User-Agent": "*"},
+                              **kwargs)
+                except DeadlineExceeded:
+                    return
             yield feat
 
     def subscriptions(self, limit: int = None, read: bool = True, **kwargs) -> Generator[dict, None, None]:
@@ -500,7 +698,11 @@ class _IFBaseAPI:
 
         for feat in self._get_feed(SUBSCRIPTIONS_FEED, limit, **kwargs):
             if read:
-                self._put(READS.format(feat["id"]), params={"from": "subs"}, headers={"User-Agent": "*"}, **kwargs)
+                try:
+                    self._put(READS.format(feat["id"]), params={"from": "subs"}, headers={"User-Agent": "*"},
+                              **kwargs)
+                except DeadlineExceeded:
+                    return
             yield feat
 
     def popular(self, limit: int = None, **kwargs) -> Generator[dict, None, None]:
@@ -530,7 +732,10 @@ class _IFBaseAPI:
         iterator = iter(int, 1) if limit is None else range(limit)
         for _ in iterator:
             # iFunny uses POST to retrieve collective. Why? 'Tis a mystery ...
-            jso = self._post(COLLECTIVE_FEED, params={"limit": 1}, **kwargs)
+            try:
+                jso = self._post(COLLECTIVE_FEED, params={"limit": 1}, **kwargs)
+            except DeadlineExceeded:
+                return
             fitem = jso["data"]["content"]["items"][0]
             yield fitem
 
@@ -832,10 +1037,19 @@ class _IFBaseAPI:
             **kwargs: Arbitrary keyword arguments passed to requests.
 
         Returns:
-            JSON dictionary of requested iFunny user.
+            JSON dictionary of iFunny user. Concurrent identical calls may share
+            one request and return the same dictionary, which must not be
+            mutated.
         """
 
-        return self._get(USER_BY_NICK.format(nick), **kwargs)["data"]
+        if self.store is not None:
+            user = self.store.user_by_nick(nick)
+            if user is not None:
+                return user
+        user = self._get(USER_BY_NICK.format(nick), coalesce=True, **kwargs)["data"]
+        if self.store is not None:
+            self.store.upsert_users([user])
+        return user
 
     def is_nick_available(self, nick: str, **kwargs) -> bool:
         """Check if nickname is available for registration.
@@ -877,3 +1091,245 @@ class IFAPI(_IFBaseAPI):
 
         width, height = image.size
         return image.crop((0, 0, width, height - 20))
+
+    @staticmethod
+    def _iter_bulk(func: Callable[[str], Any], keys: Iterable[str],
+                   max_workers: int) -> Generator[Tuple[str, Any, Optional[Exception]], None, None]:
+        """Call func concurrently for every distinct key, yielding as completed.
+
+        At most twice max_workers calls are queued at once and keys are read
+        only as calls are queued, so keys may be a lazy iterable of any
+        length. Only the set of keys seen so far is kept for deduplication.
+
+        Args:
+            func: Callable retrieving the result for one key.
+            keys: Keys for which to call func.
+            max_workers: Maximum number of concurrent calls.
+
+        Returns:
+            Generator of tuples of key, result and exception (None on success).
+        """
+
+        keys = iter(keys)
+        seen = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+
+            def submit(count: int):
+                if count <= 0:
+                    return
+                for key in keys:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    pending[executor.submit(func, key)] = key
+                    count -= 1
+                    if not count:
+                        return
+
+            submit(2 * max_workers)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    exc = future.exception()
+                    yield key, None if exc is not None else future.result(), exc
+                submit(len(done))
+
+    @classmethod
+    def _collect_bulk(cls, func: Callable[[str], Any], keys: Iterable[str], max_workers: int) -> BulkResult:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        errors = {}
+        for key, result, exc in cls._iter_bulk(func, keys, max_workers):
+            if exc is None:
+                found[key] = result
+            else:
+                errors[key] = exc
+        return BulkResult(OrderedDict((key, found[key]) for key in keys if key in found), errors)
+
+    @staticmethod
+    def digest_dates(start: date, end: date = None, weekday: int = DIGEST_WEEKDAY) -> List[date]:
+        """Enumerate weekly digest dates in a date range.
+
+        Args:
+            start: First date of range.
+            end: Last date of range, defaults to today. Future dates are
+                never included.
+            weekday: Weekday on which digests are dated, as date.weekday().
+
+        Returns:
+            List of digest dates, oldest first.
+        """
+
+        end = min(end or date.today(), date.today())
+        first = start + timedelta(days=(weekday - start.weekday()) % 7)
+        if first > end:
+            return []
+        return [first + timedelta(weeks=week) for week in range((end - first).days // 7 + 1)]
+
+    def digests(self, start: date, end: date = None, max_workers: int = 8, cache: DiskCache = None,
+                current_ttl: float = 3600.0, weekday: int = DIGEST_WEEKDAY, **kwargs) -> BulkResult:
+        """Retrieve weekly digests in a date range concurrently.
+
+        Digests older than a week never change and are cached permanently
+        once fetched after that point; newer ones are cached for current_ttl
+        seconds and never served as settled.
+
+        Args:
+            start: First date of range.
+            end: Last date of range, defaults to today.
+            max_workers: Maximum number of concurrent requests.
+            cache: Disk cache of digests. None disables caching.
+            current_ttl: Seconds the digest of the current week is cached.
+            weekday: Weekday on which digests are dated, as date.weekday().
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            BulkResult of lists of JSON dictionaries of iFunny posts keyed by
+            digest date, oldest first, and exceptions of failed digests.
+        """
+
+        settled = date.today() - timedelta(weeks=1)
+
+        def fetch(day: date) -> List[dict]:
+            # Separate keys, so a snapshot taken while a digest was current is
+            # never mistaken for its settled content
+            if day < settled:
+                key, max_age = f"digest:settled:{day:%Y%m%d}", None
+            else:
+                key, max_age = f"digest:current:{day:%Y%m%d}", current_ttl
+            if cache is not None:
+                posts = cache.get(key, max_age)
+                if posts is not None:
+                    return posts
+            posts = self.digest_posts(day=day.day, month=day.month, year=day.year, **kwargs)
+            if cache is not None:
+                cache.set(key, posts)
+            return posts
+
+        return self._collect_bulk(fetch, self.digest_dates(start, end, weekday), max_workers)
+
+    def iter_post_infos(self, post_ids: Iterable[str], max_workers: int = 8,
+                        **kwargs) -> Generator[Tuple[str, Any, Optional[Exception]], None, None]:
+        """Retrieve many iFunny posts concurrently, yielding as completed.
+
+        Args:
+            post_ids: iFunny IDs of posts to retrieve.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            Generator of tuples of post ID, JSON dictionary of iFunny post
+            and exception (None on success).
+        """
+
+        return self._iter_bulk(lambda post_id: self.post_info(post_id=post_id, **kwargs), post_ids, max_workers)
+
+    def post_infos(self, post_ids: Iterable[str], max_workers: int = 8, **kwargs) -> BulkResult:
+        """Retrieve many iFunny posts concurrently.
+
+        Args:
+            post_ids: iFunny IDs of posts to retrieve.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            BulkResult of JSON dictionaries of iFunny posts in requested order
+            and exceptions of failed posts.
+        """
+
+        return self._collect_bulk(lambda post_id: self.post_info(post_id=post_id, **kwargs), post_ids, max_workers)
+
+    def iter_user_infos(self, user_ids: Iterable[str], max_workers: int = 8,
+                        **kwargs) -> Generator[Tuple[str, Any, Optional[Exception]], None, None]:
+        """Retrieve many iFunny users concurrently, yielding as completed.
+
+        Args:
+            user_ids: iFunny IDs of users to retrieve.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            Generator of tuples of user ID, JSON dictionary of iFunny user
+            and exception (None on success).
+        """
+
+        return self._iter_bulk(lambda user_id: self.user_info(user_id=user_id, **kwargs), user_ids, max_workers)
+
+    def user_infos(self, user_ids: Iterable[str], max_workers: int = 8, **kwargs) -> BulkResult:
+        """Retrieve many iFunny users concurrently.
+
+        Args:
+            user_ids: iFunny IDs of users to retrieve.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            BulkResult of JSON dictionaries of iFunny users in requested order
+            and exceptions of failed users.
+        """
+
+        return self._collect_bulk(lambda user_id: self.user_info(user_id=user_id, **kwargs), user_ids, max_workers)
+
+    def iter_users_by_nick(self, nicks: Iterable[str], max_workers: int = 8,
+                           **kwargs) -> Generator[Tuple[str, Any, Optional[Exception]], None, None]:
+        """Retrieve many iFunny users from nicknames, yielding as completed.
+
+        Args:
+            nicks: Nicknames of users.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            Generator of tuples of nickname, JSON dictionary of iFunny user
+            and exception (None on success).
+        """
+
+        return self._iter_bulk(lambda nick: self.user_by_nick(nick, **kwargs), nicks, max_workers)
+
+    def users_by_nick(self, nicks: Iterable[str], max_workers: int = 8, **kwargs) -> BulkResult:
+        """Retrieve many iFunny users from nicknames concurrently.
+
+        Args:
+            nicks: Nicknames of users.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            BulkResult of JSON dictionaries of iFunny users in requested order
+            and exceptions of failed nicknames.
+        """
+
+        return self._collect_bulk(lambda nick: self.user_by_nick(nick, **kwargs), nicks, max_workers)
+
+    def iter_nicks_available(self, nicks: Iterable[str], max_workers: int = 8,
+                             **kwargs) -> Generator[Tuple[str, Any, Optional[Exception]], None, None]:
+        """Check many nicknames for availability, yielding as completed.
+
+        Args:
+            nicks: Nicknames for which to check availability.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            Generator of tuples of nickname, availability and exception (None
+            on success).
+        """
+
+        return self._iter_bulk(lambda nick: self.is_nick_available(nick, **kwargs), nicks, max_workers)
+
+    def nicks_available(self, nicks: Iterable[str], max_workers: int = 8, **kwargs) -> BulkResult:
+        """Check many nicknames for availability concurrently.
+
+        Args:
+            nicks: Nicknames for which to check availability.
+            max_workers: Maximum number of concurrent requests.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            BulkResult of availability in requested order and exceptions of
+            failed nicknames.
+        """
+
+        return self._collect_bulk(lambda nick: self.is_nick_available(nick, **kwargs), nicks, max_workers)
@@ -0,0 +1,75 @@
+"""On-disk JSON cache for immutable or slowly changing iFunny responses."""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any
+
+
+class DiskCache:
+    """Directory of gzipped JSON files keyed by string.
+
+    Writes are atomic, so the cache can be shared between threads and
+    processes.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directory in which to store cached entries.
+        """
+
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json.gz")
+
+    def get(self, key: str, max_age: float = None) -> Any:
+        """Retrieve a cached value.
+
+        Args:
+            key: Cache key.
+            max_age: Seconds after which an entry is stale. None never
+                expires entries.
+
+        Returns:
+            Cached value, None if missing or stale.
+        """
+
+        path = self._path(key)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, EOFError, ValueError):
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store a JSON serializable value.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+        """
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as file:
+                file.write(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def delete(self, key: str):
+        """Remove a cached value if present."""
+
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,324 @@
+"""Command-line crawler for the iFunny API.
+
+Paged crawls (user, tag, channel and comment streams) are split into one
+work unit per target and drained by a pool of threads sharing one client.
+With --checkpoint the work queue is kept in a file, so an interrupted crawl
+resumes from the last fetched page of every target when run again.
+
+Example:
+
+export IFUNNY_TOKEN=token
+ifunnyapi tags meme cat --limit 5000 -o posts.ndjson.gz --concurrency 8 --rate 10
+ifunnyapi users subscribers 5c9b1a0e4b7f -o users.db --checkpoint crawl.queue
+ifunnyapi channels wtf animals -o channels.ndjson
+ifunnyapi feed featured --limit 100 -o featured.ndjson
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Iterable, List
+
+from .api import PAGE_SIZE, IFAPI
+from .enums import IFChannel
+from .endpoints import BASE
+from .metrics import MetricsCollector
+from .ratelimit import RateLimiter
+from .sinks import NDJSONSink, ParquetSink, SQLiteSink
+from .transport import HTTPXTransport, RateLimitedTransport, RequestsTransport
+from .workqueue import WorkQueue, run_worker
+
+USER_KINDS = ("posts", "features", "subscribers", "subscriptions", "guests", "info")
+FEEDS = ("featured", "subscriptions", "popular", "collective")
+
+
+def _open_sink(path: str, batch_size: int, append: bool):
+    """Pick a sink from the output file extension."""
+
+    lower = path.lower()
+    if lower.endswith((".db", ".sqlite", ".sqlite3")):
+        return SQLiteSink(path, batch_size=batch_size)
+    if lower.endswith(".parquet"):
+        if append:
+            raise ValueError("Parquet output cannot be resumed, use NDJSON or SQLite output")
+        return ParquetSink(path, batch_size=batch_size)
+    return NDJSONSink(path, batch_size=batch_size, append=append)
+
+
+def _read_targets(args) -> List[str]:
+    targets = list(args.targets)
+    if args.input:
+        with (sys.stdin if args.input == "-" else open(args.input)) as f:
+            targets.extend(line.strip() for line in f if line.strip())
+    return list(dict.fromkeys(targets))
+
+
+def _page_size(value: str) -> int:
+    size = int(value)
+    if not 1 <= size <= PAGE_SIZE:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {PAGE_SIZE}")
+    return size
+
+
+def _limit(value: str) -> int:
+    limit = int(value)
+    if limit < 0:
+        raise argparse.ArgumentTypeError("must be at least 0")
+    return limit
+
+
+def _channel_id(name: str) -> str:
+    """Resolve an IFChannel name, e.g. "wtf", to its channel ID."""
+
+    try:
+        return IFChannel[name.upper().replace("-", "_")].value
+    except KeyError:
+        return name
+
+
+class _Progress:
+    """Periodically print request and item throughput and latency."""
+
+    def __init__(self, metrics: MetricsCollector, sink, interval: float, stream=sys.stderr):
+        self.metrics = metrics
+        self.sink = sink
+        self.interval = interval
+        self.stream = stream
+        self.units = None
+        self.start = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ifunnyapi-progress", daemon=True)
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        summary = self.metrics.summary()
+        items = self.sink.count + self.sink.buffered
+        line = (f"[{elapsed:7.1f}s] requests {summary['requests']} ({summary['requests'] / elapsed:.1f}/s) "
+                f"items {items} ({items / elapsed:.1f}/s) "
+                f"latency p50 {summary['latency_p50'] * 1000:.0f}ms p99 {summary['latency_p99'] * 1000:.0f}ms "
+                f"errors {summary['errors']}")
+        if self.units is not None:
+            counts = self.units()
+            line += f" units {counts.get('done', 0)}/{sum(counts.values())}"
+            if counts.get("failed"):
+                line += f" ({counts['failed']} failed)"
+        return line
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.stream.write(self.line() + "\n")
+            self.stream.flush()
+
+    def __enter__(self):
+        if self.interval > 0:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stopped.set()
+        self.stream.write(self.line() + "\n")
+        self.stream.flush()
+
+
+def _crawl_paged(api: IFAPI, args, kind: str, targets: Iterable[str], sink, progress: _Progress) -> int:
+    """Crawl paged streams of targets through a work queue.
+
+    Returns:
+        Process exit status.
+    """
+
+    if args.checkpoint:
+        queue_path = args.checkpoint
+    else:
+        fd, queue_path = tempfile.mkstemp(prefix="ifunnyapi-", suffix=".queue")
+        os.close(fd)
+    queue = WorkQueue(queue_path, args.lease)
+    queue.put_many(kind, targets)
+
+    def units():
+        # Queue connections cannot be shared between threads
+        counter = WorkQueue(queue_path)
+        try:
+            return counter.counts()
+        finally:
+            counter.close()
+
+    progress.units = units
+    lock = threading.Lock()
+    stop = threading.Event()
+    finished = threading.Semaphore(0)
+
+    def handle(unit, items):
+        # Pages are flushed before their cursor is checkpointed, so a resumed
+        # crawl never skips items that were still buffered
+        with lock:
+            sink.write_all(items)
+
+    def work():
+        worker_queue = WorkQueue(queue_path, args.lease)
+        try:
+            run_worker(api, worker_queue, handle, page_size=args.page_size, limit=args.limit, stop=stop)
+        finally:
+            worker_queue.close()
+            finished.release()
+
+    threads = [threading.Thread(target=work, name=f"ifunnyapi-worker-{i}", daemon=True)
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    # Thread.join interrupted by KeyboardInterrupt may return early on later
+    # calls, so wait for workers to signal completion instead
+    running = len(threads)
+    try:
+        while running:
+            if finished.acquire(timeout=0.2):
+                running -= 1
+    except KeyboardInterrupt:
+        stop.set()
+        sys.stderr.write("interrupted, finishing in-flight pages\n")
+        while running:
+            finished.acquire()
+            running -= 1
+    counts = queue.counts()
+    queue.close()
+    progress.units = lambda: counts
+    if not args.checkpoint:
+        os.remove(queue_path)
+    elif counts.get("pending") or counts.get("leased"):
+        sys.stderr.write(f"resume with --checkpoint {args.checkpoint}\n")
+    if stop.is_set():
+        return 130
+    return 1 if counts.get("failed") else 0
+
+
+def _crawl_users_info(api: IFAPI, args, targets: List[str], sink) -> int:
+    failed = 0
+    for user_id, user, exc in api.iter_user_infos(targets, max_workers=args.concurrency):
+        if exc is not None:
+            failed += 1
+            sys.stderr.write(f"{user_id}: {type(exc).__name__}: {exc}\n")
+            continue
+        sink.write(user)
+    return 1 if failed else 0
+
+
+def _crawl_feed(api: IFAPI, args, sink) -> int:
+    if args.feed in ("featured", "subscriptions"):
+        items = getattr(api, args.feed)(args.limit, read=args.read)
+    else:
+        items = getattr(api, args.feed)(args.limit)
+    try:
+        for item in items:
+            sink.write(item)
+    except KeyboardInterrupt:
+        sys.stderr.write("interrupted\n")
+        return 130
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the ifunnyapi command-line argument parser."""
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-o", "--output", required=True,
+                        help="output file; .db/.sqlite for SQLite, .parquet for Parquet, "
+                             "otherwise NDJSON (compressed if .gz/.bz2/.xz)")
+    common.add_argument("--token", default=os.environ.get("IFUNNY_TOKEN"),
+                        help="iFunny bearer token (default: $IFUNNY_TOKEN)")
+    common.add_argument("--base", default=BASE, help="iFunny API base URL")
+    common.add_argument("-c", "--concurrency", type=int, default=4, help="number of concurrent requests")
+    common.add_argument("--rate", type=float, help="maximum requests per second")
+    common.add_argument("--burst", type=int, help="requests allowed at once by --rate")
+    common.add_argument("--limit", type=_limit, help="number of items per target (per feed for feed)")
+    common.add_argument("--page-size", type=_page_size, default=PAGE_SIZE,
+                        help=f"number of items per request, 1 to {PAGE_SIZE}")
+    common.add_argument("--checkpoint", help="work queue file used to resume an interrupted crawl")
+    common.add_argument("--lease", type=float, default=120.0,
+                        help="seconds before a unit claimed by a dead crawler is retried")
+    common.add_argument("--batch-size", type=int, default=1000, help="items per output write; paged crawls "
+                             "write every page at once so it can be checkpointed")
+    common.add_argument("--stats-interval", type=float, default=2.0,
+                        help="seconds between progress lines, 0 to disable")
+    common.add_argument("--http2", action="store_true", help="use HTTP/2 (requires ifunnyapi[http2])")
+
+    def add_targets(command: argparse.ArgumentParser, help: str):
+        command.add_argument("targets", nargs="*", help=help)
+        command.add_argument("-i", "--input", help="file of targets, one per line, - for stdin")
+
+    parser = argparse.ArgumentParser(prog="ifunnyapi", description="Crawl the iFunny API.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+    users = commands.add_parser("users", parents=[common], help="crawl user streams")
+    users.add_argument("kind", choices=USER_KINDS, help="user stream, or info for profiles")
+    add_targets(users, "iFunny user IDs")
+    add_targets(commands.add_parser("tags", parents=[common], help="crawl posts by hashtag"), "hashtags")
+    add_targets(commands.add_parser("channels", parents=[common], help="crawl channel posts"),
+                "channel names ({}) or IDs".format(", ".join(channel.name.lower() for channel in IFChannel)))
+    add_targets(commands.add_parser("comments", parents=[common], help="crawl post comments"),
+                "iFunny post IDs")
+    feed = commands.add_parser("feed", parents=[common], help="crawl a feed")
+    feed.add_argument("feed", choices=FEEDS)
+    feed.add_argument("--no-read", dest="read", action="store_false",
+                      help="do not mark featured or subscriptions posts as read")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the ifunnyapi command-line crawler.
+
+    Args:
+        argv: Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        Process exit status.
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error("an iFunny token is required, pass --token or set IFUNNY_TOKEN")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    if args.command == "feed":
+        kind, targets = None, []
+    else:
+        targets = _read_targets(args)
+        if not targets and not args.checkpoint:
+            parser.error("no targets given")
+        if args.command == "users":
+            kind = f"user_{args.kind}"
+        elif args.command == "tags":
+            kind = "tag_posts"
+            targets = [target.lstrip("#") for target in targets]
+        elif args.command == "channels":
+            kind = "channel_posts"
+            targets = [_channel_id(target) for target in targets]
+        else:
+            kind = "post_comments"
+    resume = kind not in (None, "user_info") and bool(args.checkpoint) and os.path.exists(args.checkpoint)
+    try:
+        sink = _open_sink(args.output, args.batch_size, resume)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    if args.http2:
+        transport = HTTPXTransport(max_connections=args.concurrency)
+    else:
+        transport = RequestsTransport(pool_maxsize=max(args.concurrency, 10))
+    if args.rate:
+        transport = RateLimitedTransport(transport, RateLimiter(args.rate, args.burst))
+    metrics = MetricsCollector()
+    api = IFAPI(args.token, hooks=[metrics], base=args.base, transport=transport)
+    try:
+        with sink, _Progress(metrics, sink, args.stats_interval) as progress:
+            if kind is None:
+                return _crawl_feed(api, args, sink)
+            if kind == "user_info":
+                return _crawl_users_info(api, args, targets, sink)
+            return _crawl_paged(api, args, kind, targets, sink, progress)
+    finally:
+        transport.close()
@@ -15,3 +15,30 @@ class APIError(IFAPIException):
 
     def __str__(self):
         return f"status {self.status}, {self.desc}"
+
+
+class PoolExhausted(IFAPIException):
+    """Raised when no healthy token is left in an IFAPIPool."""
+
+
+class DeadlineExceeded(IFAPIException):
+    """Raised when an operation deadline expires or is cancelled."""
+
+    def __init__(self, cancelled: bool = False):
+        super().__init__()
+        self.cancelled = cancelled
+
+    def __str__(self):
+        return "operation cancelled" if self.cancelled else "operation deadline exceeded"
+
+
+class CassetteMiss(IFAPIException):
+    """Raised when a replayed request was not recorded in the cassette."""
+
+    def __init__(self, method: str, url: str):
+        super().__init__()
+        self.method = method
+        self.url = url
+
+    def __str__(self):
+        return f"no recorded response for {self.method} {self.url}"
@@ -0,0 +1,344 @@
+"""Compact iFunny social graph storage and breadth-first crawling.
+
+Example:
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.graph import crawl_graph
+api = IFAPI("token")
+graph = crawl_graph(api, [api.account["id"]], depth=2)
+graph.save("graph.ifg")
+"""
+
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+import struct
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .endpoints import USER_SUBSCRIBERS, USER_SUBSCRIPTIONS
+
+_MAGIC = b"IFG1"
+_HEADER = struct.Struct("<4sQQ")
+_ID_HEADER = struct.Struct("<BH")
+_RAW_ID = 0
+_STR_ID = 1
+
+SUBSCRIBERS = "subscribers"
+SUBSCRIPTIONS = "subscriptions"
+BOTH = "both"
+
+
+def _encode_id(user_id: str) -> Union[bytes, str]:
+    """Pack a 24 character hex iFunny ID into 12 raw bytes when possible."""
+
+    if len(user_id) == 24:
+        try:
+            return bytes.fromhex(user_id)
+        except ValueError:
+            pass
+    return user_id
+
+
+def _decode_id(key: Union[bytes, str]) -> str:
+    return key.hex() if isinstance(key, bytes) else key
+
+
+def _to_le(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+class IFGraph:
+    """Directed iFunny user graph.
+
+    User IDs are interned to consecutive integers and edges are kept in
+    array-backed buffers. New edges are appended to coordinate buffers and
+    merged into compressed sparse row (CSR) form by compact(). An edge
+    u -> v means user u is subscribed to user v.
+    """
+
+    def __init__(self):
+        self._index: Dict[Union[bytes, str], int] = {}
+        self._keys: List[Union[bytes, str]] = []
+        self._expanded = bytearray()
+        self._offsets = array("Q", [0])
+        self._targets = array("I")
+        self._pending_src = array("I")
+        self._pending_dst = array("I")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, user_id: str) -> bool:
+        return _encode_id(user_id) in self._index
+
+    @property
+    def edge_count(self) -> int:
+        """Number of stored edges, including not yet compacted edges."""
+
+        return len(self._targets) + len(self._pending_src)
+
+    def intern(self, user_id: str) -> int:
+        """Retrieve the integer index of a user, assigning one if needed.
+
+        Args:
+            user_id: iFunny ID of user.
+
+        Returns:
+            Integer index of user.
+        """
+
+        key = _encode_id(user_id)
+        idx = self._index.get(key)
+        if idx is None:
+            idx = len(self._keys)
+            self._index[key] = idx
+            self._keys.append(key)
+            self._expanded.append(0)
+        return idx
+
+    def index(self, user_id: str) -> int:
+        """Retrieve the integer index of a known user.
+
+        Raises:
+            KeyError: User is not in the graph.
+        """
+
+        return self._index[_encode_id(user_id)]
+
+    def user_id(self, idx: int) -> str:
+        """Retrieve the iFunny ID of the user at an integer index."""
+
+        return _decode_id(self._keys[idx])
+
+    def is_expanded(self, idx: int) -> bool:
+        """Check if the edges of a user have already been crawled."""
+
+        return bool(self._expanded[idx])
+
+    def mark_expanded(self, idx: int):
+        """Mark the edges of a user as crawled."""
+
+        self._expanded[idx] = 1
+
+    def add_edge(self, src: int, dst: int):
+        """Add an edge between two interned users."""
+
+        self._pending_src.append(src)
+        self._pending_dst.append(dst)
+
+    def compact(self):
+        """Merge pending edges into CSR form, dropping duplicate edges."""
+
+        if not self._pending_src and len(self._offsets) == len(self._keys) + 1:
+            return
+        nodes = len(self._keys)
+        old_rows = len(self._offsets) - 1
+        starts = array("Q", bytes(8 * (nodes + 1)))
+        for src in range(old_rows):
+            starts[src + 1] = self._offsets[src + 1] - self._offsets[src]
+        for src in self._pending_src:
+            starts[src + 1] += 1
+        for src in range(nodes):
+            starts[src + 1] += starts[src]
+
+        # Counting sort of old and pending edges by source user
+        placed = array("I", bytes(4 * starts[nodes]))
+        fill = array("Q", starts)
+        for src in range(old_rows):
+            row = self._targets[self._offsets[src]:self._offsets[src + 1]]
+            placed[fill[src]:fill[src] + len(row)] = row
+            fill[src] += len(row)
+        for src, dst in zip(self._pending_src, self._pending_dst):
+            placed[fill[src]] = dst
+            fill[src] += 1
+
+        offsets = array("Q", [0])
+        targets = array("I")
+        for src in range(nodes):
+            targets.extend(sorted(set(placed[starts[src]:starts[src + 1]])))
+            offsets.append(len(targets))
+        self._offsets = offsets
+        self._targets = targets
+        self._pending_src = array("I")
+        self._pending_dst = array("I")
+
+    def successors(self, user_id: str) -> List[str]:
+        """Retrieve the users a user is subscribed to.
+
+        Args:
+            user_id: iFunny ID of user.
+
+        Returns:
+            List of iFunny IDs of users subscribed to by the user.
+        """
+
+        self.compact()
+        idx = self.index(user_id)
+        return [self.user_id(dst) for dst in self._targets[self._offsets[idx]:self._offsets[idx + 1]]]
+
+    def predecessors(self, user_id: str) -> List[str]:
+        """Retrieve the users subscribed to a user.
+
+        Args:
+            user_id: iFunny ID of user.
+
+        Returns:
+            List of iFunny IDs of subscribers of the user.
+        """
+
+        self.compact()
+        idx = self.index(user_id)
+        found = []
+        for src in range(len(self._keys)):
+            row = self._targets[self._offsets[src]:self._offsets[src + 1]]
+            if idx in row:
+                found.append(self.user_id(src))
+        return found
+
+    def csr(self) -> Tuple[array, array]:
+        """Retrieve the compacted CSR buffers.
+
+        Returns:
+            Tuple of row offsets and edge targets arrays.
+        """
+
+        self.compact()
+        return self._offsets, self._targets
+
+    def save(self, path: str):
+        """Save graph to a compact little-endian binary file.
+
+        Args:
+            path: File path to which to save graph.
+        """
+
+        self.compact()
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, len(self._keys), len(self._targets)))
+            for key in self._keys:
+                if isinstance(key, bytes):
+                    file.write(_ID_HEADER.pack(_RAW_ID, len(key)))
+                    file.write(key)
+                else:
+                    data = key.encode()
+                    file.write(_ID_HEADER.pack(_STR_ID, len(data)))
+                    file.write(data)
+            file.write(bytes(self._expanded))
+            file.write(_to_le(self._offsets))
+            file.write(_to_le(self._targets))
+
+    @classmethod
+    def load(cls, path: str) -> "IFGraph":
+        """Load graph previously saved with save().
+
+        Args:
+            path: File path from which to load graph.
+
+        Returns:
+            Loaded graph.
+        """
+
+        graph = cls()
+        with open(path, "rb") as file:
+            magic, nodes, edges = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not an ifunnyapi graph file")
+            for idx in range(nodes):
+                kind, size = _ID_HEADER.unpack(file.read(_ID_HEADER.size))
+                data = file.read(size)
+                key = data if kind == _RAW_ID else data.decode()
+                graph._index[key] = idx
+                graph._keys.append(key)
+            graph._expanded = bytearray(file.read(nodes))
+            graph._offsets = _from_le("Q", file.read(8 * (nodes + 1)))
+            graph._targets = _from_le("I", file.read(4 * edges))
+        return graph
+
+
+def crawl_graph(api, seeds: Iterable[str], *, depth: int = 1, direction: str = SUBSCRIBERS,
+                limit: int = None, max_workers: int = 8, max_nodes: int = None,
+                graph: IFGraph = None, on_error: Callable[[str, Exception], Any] = None,
+                **kwargs) -> IFGraph:
+    """Crawl the iFunny subscription graph breadth first.
+
+    Each frontier is fetched concurrently. Subscribers and subscriptions
+    are streamed page by page and only user IDs are kept, so at most one
+    page of user dictionaries per fetched user is held at a time. A user that cannot be fetched, e.g. a
+    private or deleted one, does not stop the crawl; it is left unexpanded,
+    so crawling again with graph=... retries it.
+
+    Args:
+        api: IFAPI instance used to retrieve subscribers and subscriptions.
+        seeds: iFunny IDs of users from which to start crawling.
+        depth: Number of breadth first levels to expand.
+        direction: One of "subscribers", "subscriptions" or "both".
+        limit: Number of subscribers/subscriptions to retrieve per user.
+        max_workers: Maximum number of concurrently fetched users.
+        max_nodes: Stop discovering new users past this graph size.
+        graph: Existing graph to extend; already expanded users are skipped.
+        on_error: Callable receiving the ID and exception of every user that
+            could not be fetched.
+        **kwargs: Arbitrary keyword arguments passed to requests.
+
+    Returns:
+        Crawled graph.
+    """
+
+    if direction not in (SUBSCRIBERS, SUBSCRIPTIONS, BOTH):
+        raise ValueError(f"invalid crawl direction {direction!r}")
+    graph = graph if graph is not None else IFGraph()
+
+    def user_ids(path: str) -> List[str]:
+        return [user["id"] for users, _ in api._iter_paging_pages(path, "users", limit, **kwargs) for user in users]
+
+    def fetch(user_id: str) -> Tuple[List[str], List[str], Optional[Exception]]:
+        subscribers = subscriptions = []
+        try:
+            if direction in (SUBSCRIBERS, BOTH):
+                subscribers = user_ids(USER_SUBSCRIBERS.format(user_id))
+            if direction in (SUBSCRIPTIONS, BOTH):
+                subscriptions = user_ids(USER_SUBSCRIPTIONS.format(user_id))
+        except Exception as exc:
+            return [], [], exc
+        return subscribers, subscriptions, None
+
+    frontier = [graph.intern(seed) for seed in seeds]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(depth):
+            frontier = [idx for idx in dict.fromkeys(frontier) if not graph.is_expanded(idx)]
+            if not frontier:
+                break
+            discovered = []
+            results = executor.map(fetch, [graph.user_id(idx) for idx in frontier])
+            for idx, (subscribers, subscriptions, exc) in zip(frontier, results):
+                if exc is not None:
+                    if on_error is not None:
+                        on_error(graph.user_id(idx), exc)
+                    continue
+                graph.mark_expanded(idx)
+                for user_id in subscribers:
+                    if max_nodes is not None and len(graph) >= max_nodes and user_id not in graph:
+                        continue
+                    src = graph.intern(user_id)
+                    graph.add_edge(src, idx)
+                    discovered.append(src)
+                for user_id in subscriptions:
+                    if max_nodes is not None and len(graph) >= max_nodes and user_id not in graph:
+                        continue
+                    dst = graph.intern(user_id)
+                    graph.add_edge(idx, dst)
+                    discovered.append(dst)
+            frontier = discovered
+    graph.compact()
+    return graph
@@ -0,0 +1,241 @@
+"""Per-endpoint request instrumentation for ifunnyapi.
+
+Request hooks are callables that receive a RequestEvent after every
+request made by the client, whether it succeeded or raised. Exceptions
+raised by hooks are logged and do not affect the request.
+
+Example:
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.metrics import MetricsCollector
+metrics = MetricsCollector()
+api = IFAPI("token", hooks=[metrics])
+api.user_posts(user_id=api.account["id"])
+print(metrics.to_prometheus())
+"""
+
+from bisect import bisect_left
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from . import endpoints
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestEvent(NamedTuple):
+    """Record of a single iFunny API request."""
+
+    method: str
+    endpoint: str
+    path: str
+    status: int
+    latency: float
+    bytes_in: int
+    bytes_out: int
+    error: Optional[str]
+
+
+def _compile_templates() -> List[Tuple["re.Pattern", str]]:
+    templates = {
+        value for name, value in vars(endpoints).items()
+        if name.isupper() and isinstance(value, str) and value.startswith("/")
+    }
+    compiled = []
+    for template in templates:
+        regex = "".join(
+            "[^/]+" if part.startswith("{") else re.escape(part)
+            for part in re.split(r"(\{[^}]*\})", template) if part
+        )
+        compiled.append((re.compile(regex + "$"), template))
+    # Prefer templates with the most literal characters, e.g. /users/my/comments over /users/{}
+    compiled.sort(key=lambda pair: -len(re.sub(r"\{[^}]*\}", "", pair[1])))
+    return compiled
+
+
+_TEMPLATES = _compile_templates()
+
+
+def endpoint_template(path: str) -> str:
+    """Map a formatted iFunny API path back to its endpoints.py template.
+
+    Args:
+        path: iFunny API endpoint path, e.g. "/users/abc/subscribers".
+
+    Returns:
+        Matching template, e.g. "/users/{}/subscribers", or the path itself
+        if no template matches.
+    """
+
+    for regex, template in _TEMPLATES:
+        if regex.match(path):
+            return template
+    return path
+
+
+class _Histogram:
+    """Cumulative latency histogram with fixed upper bounds."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[idx - 1] if idx else 0.0
+                upper = self.buckets[idx] if idx < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class MetricsCollector:
+    """Thread-safe request hook aggregating counters and latency histograms."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._errors: Dict[Tuple[str, str, str], int] = {}
+        self._bytes_in: Dict[Tuple[str, str], int] = {}
+        self._bytes_out: Dict[Tuple[str, str], int] = {}
+        self._latency: Dict[Tuple[str, str], _Histogram] = {}
+
+    def __call__(self, event: RequestEvent):
+        key = (event.method, event.endpoint)
+        with self._lock:
+            rkey = key + (event.status,)
+            self._requests[rkey] = self._requests.get(rkey, 0) + 1
+            if event.error is not None:
+                ekey = key + (event.error,)
+                self._errors[ekey] = self._errors.get(ekey, 0) + 1
+            self._bytes_in[key] = self._bytes_in.get(key, 0) + event.bytes_in
+            self._bytes_out[key] = self._bytes_out.get(key, 0) + event.bytes_out
+            if key not in self._latency:
+                self._latency[key] = _Histogram(self.buckets)
+            self._latency[key].observe(event.latency)
+
+    def reset(self):
+        """Discard all collected metrics."""
+
+        with self._lock:
+            self._requests.clear()
+            self._errors.clear()
+            self._bytes_in.clear()
+            self._bytes_out.clear()
+            self._latency.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Retrieve current metrics per endpoint.
+
+        Returns:
+            Dictionary keyed by "METHOD endpoint" of dictionaries with request
+            count, statuses, errors, bytes in/out and latency statistics.
+        """
+
+        with self._lock:
+            snap = {}
+            for (method, endpoint), hist in self._latency.items():
+                key = (method, endpoint)
+                snap[f"{method} {endpoint}"] = {
+                    "requests": hist.count,
+                    "statuses": {
+                        status: count for (rmethod, rendpoint, status), count in self._requests.items()
+                        if (rmethod, rendpoint) == key
+                    },
+                    "errors": {
+                        error: count for (emethod, eendpoint, error), count in self._errors.items()
+                        if (emethod, eendpoint) == key
+                    },
+                    "bytes_in": self._bytes_in[key],
+                    "bytes_out": self._bytes_out[key],
+                    "latency_sum": hist.total,
+                    "latency_mean": hist.total / hist.count,
+                    "latency_p50": hist.quantile(0.5),
+                    "latency_p90": hist.quantile(0.9),
+                    "latency_p99": hist.quantile(0.99)
+                }
+            return snap
+
+    def summary(self) -> dict:
+        """Retrieve metrics aggregated over all endpoints.
+
+        Returns:
+            Dictionary of request and error counts, bytes in/out and latency
+            statistics.
+        """
+
+        with self._lock:
+            merged = _Histogram(self.buckets)
+            for hist in self._latency.values():
+                merged.counts = [total + count for total, count in zip(merged.counts, hist.counts)]
+                merged.total += hist.total
+                merged.count += hist.count
+            return {
+                "requests": merged.count,
+                "errors": sum(self._errors.values()),
+                "bytes_in": sum(self._bytes_in.values()),
+                "bytes_out": sum(self._bytes_out.values()),
+                "latency_mean": merged.total / merged.count if merged.count else 0.0,
+                "latency_p50": merged.quantile(0.5),
+                "latency_p90": merged.quantile(0.9),
+                "latency_p99": merged.quantile(0.99)
+            }
+
+    def to_prometheus(self, prefix: str = "ifunnyapi") -> str:
+        """Export metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix.
+
+        Returns:
+            Prometheus text format metrics.
+        """
+
+        def labels(method: str, endpoint: str, **extra) -> str:
+            pairs = [("method", method), ("endpoint", endpoint)] + list(extra.items())
+            return ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                            for name, value in pairs)
+
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {prefix}_requests_total iFunny API requests.")
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            for (method, endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f"{prefix}_requests_total{{{labels(method, endpoint, status=status)}}} {count}")
+            lines.append(f"# HELP {prefix}_errors_total iFunny API requests that raised.")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for (method, endpoint, error), count in sorted(self._errors.items()):
+                lines.append(f"{prefix}_errors_total{{{labels(method, endpoint, error=error)}}} {count}")
+            for name, totals in (("received", self._bytes_in), ("sent", self._bytes_out)):
+                lines.append(f"# HELP {prefix}_bytes_{name}_total Body bytes {name}.")
+                lines.append(f"# TYPE {prefix}_bytes_{name}_total counter")
+                for (method, endpoint), count in sorted(totals.items()):
+                    lines.append(f"{prefix}_bytes_{name}_total{{{labels(method, endpoint)}}} {count}")
+            lines.append(f"# HELP {prefix}_request_duration_seconds iFunny API request latency.")
+            lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+            for (method, endpoint), hist in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{prefix}_request_duration_seconds_bucket"
+                                 f"{{{labels(method, endpoint, le=le)}}} {cumulative}")
+                lines.append(f"{prefix}_request_duration_seconds_sum{{{labels(method, endpoint)}}} {hist.total}")
+                lines.append(f"{prefix}_request_duration_seconds_count{{{labels(method, endpoint)}}} {hist.count}")
+        return "\n".join(lines) + "\n"
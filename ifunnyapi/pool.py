@@ -0,0 +1,242 @@
+"""Pool of iFunny clients spreading read-only calls across many tokens.
+
+Example:
+
+from ifunnyapi.pool import IFAPIPool
+pool = IFAPIPool(["token1", "token2", "token3"], rate=5)
+posts = pool.tag_posts(tag="meme", limit=500)
+print(pool.stats())
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from .api import IFAPI
+from .exceptions import APIError, PoolExhausted
+from .ratelimit import RateLimiter
+from .transport import TRANSPORT_ERRORS, RateLimitedTransport, RequestsTransport
+
+READ_METHODS = frozenset((
+    "user_info",
+    "post_info",
+    "comment_info",
+    "channels_info",
+    "user_subscribers",
+    "user_subscriptions",
+    "user_posts",
+    "user_features",
+    "user_guests",
+    "channel_posts",
+    "tag_posts",
+    "post_comments",
+    "post_smiles_users",
+    "post_repubs_users",
+    "comment_replies",
+    "digest_posts",
+    "user_by_nick",
+    "is_nick_available",
+    "is_email_available"
+))
+
+# Statuses that mean the token itself is no longer valid. A 403 is left out:
+# it is returned per resource, e.g. for a user who blocked the account.
+_REVOKED_STATUSES = (401,)
+
+
+def _is_token_failure(exc: Exception) -> bool:
+    """Check if an error reflects on the token or service, not the request."""
+
+    if isinstance(exc, APIError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, TRANSPORT_ERRORS)
+
+
+class _Member:
+    """Pooled client and its usage and health state."""
+
+    def __init__(self, api: IFAPI, limiter: RateLimiter = None):
+        self.api = api
+        self.limiter = limiter
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = 0.0
+        self.suspended_until = 0.0
+        self.removed = None
+
+    def available(self, now: float) -> bool:
+        return self.removed is None and self.suspended_until <= now
+
+
+class IFAPIPool:
+    """Dispatch read-only IFAPI calls to the least-loaded healthy token.
+
+    Each token has its own client and optional rate limiter. A token is
+    suspended for cooldown seconds after max_failures consecutive
+    rate-limit, server or connection failures, and removed for good once the
+    API reports it as revoked (status 401). Calls failing for token
+    reasons are retried on another token.
+    """
+
+    def __init__(self, tokens: Iterable[str], rate: float = None, burst: int = None,
+                 max_failures: int = 3, cooldown: float = 60.0, **kwargs):
+        """
+        Args:
+            tokens: iFunny bearer tokens.
+            rate: Requests per second allowed per token. None disables
+                rate limiting.
+            burst: Requests per token allowed at once.
+            max_failures: Consecutive failures after which a token is
+                suspended.
+            cooldown: Seconds a failing token is suspended.
+            **kwargs: Arbitrary keyword arguments passed to IFAPI.
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._members: Dict[str, _Member] = {}
+        for token in tokens:
+            self.add(token)
+
+    def add(self, token: str):
+        """Add a token to the rotation.
+
+        Args:
+            token: iFunny bearer token.
+        """
+
+        kwargs = dict(self._kwargs)
+        limiter = None
+        if self.rate:
+            # Limit every HTTP request on the token, not every pooled call
+            limiter = RateLimiter(self.rate, self.burst)
+            kwargs["transport"] = RateLimitedTransport(kwargs.get("transport") or RequestsTransport(), limiter)
+        with self._lock:
+            self._members[token] = _Member(IFAPI(token, **kwargs), limiter)
+
+    def remove(self, token: str, reason: str = "removed"):
+        """Take a token out of rotation permanently.
+
+        Args:
+            token: iFunny bearer token.
+            reason: Reason reported by stats().
+        """
+
+        with self._lock:
+            self._members[token].removed = reason
+
+    def revoke(self, token: str, **kwargs):
+        """Revoke a token and take it out of rotation.
+
+        Args:
+            token: iFunny bearer token.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+        """
+
+        self._members[token].api.revoke(**kwargs)
+        self.remove(token, "revoked")
+
+    @property
+    def tokens(self) -> List[str]:
+        """Tokens currently in rotation."""
+
+        now = time.monotonic()
+        with self._lock:
+            return [token for token, member in self._members.items() if member.available(now)]
+
+    def _checkout(self, exclude: set) -> Tuple[str, _Member]:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                (token, member) for token, member in self._members.items()
+                if member.available(now) and token not in exclude
+            ]
+            if not candidates:
+                raise PoolExhausted("no healthy token available")
+
+            def load(pair):
+                member = pair[1]
+                wait = member.limiter.wait_time() if member.limiter else 0.0
+                return (member.in_flight, wait, member.requests)
+
+            token, member = min(candidates, key=load)
+            member.in_flight += 1
+            return token, member
+
+    def _checkin(self, token: str, member: _Member, elapsed: float, exc: Exception = None):
+        with self._lock:
+            member.in_flight -= 1
+            member.requests += 1
+            member.latency += elapsed
+            if exc is None:
+                member.consecutive_failures = 0
+                return
+            if isinstance(exc, APIError) and exc.status in _REVOKED_STATUSES:
+                member.failures += 1
+                member.removed = "revoked"
+            elif _is_token_failure(exc):
+                member.failures += 1
+                member.consecutive_failures += 1
+                if member.consecutive_failures >= self.max_failures:
+                    member.suspended_until = time.monotonic() + self.cooldown
+                    member.consecutive_failures = 0
+
+    def _call(self, name: str, *args, **kwargs):
+        tried = set()
+        failure = None
+        while True:
+            try:
+                token, member = self._checkout(tried)
+            except PoolExhausted:
+                if failure is not None:
+                    raise failure
+                raise
+            tried.add(token)
+            start = time.perf_counter()
+            try:
+                retv = getattr(member.api, name)(*args, **kwargs)
+            except Exception as exc:
+                self._checkin(token, member, time.perf_counter() - start, exc)
+                if member.removed is None and not _is_token_failure(exc):
+                    raise
+                failure = exc
+                continue
+            self._checkin(token, member, time.perf_counter() - start)
+            return retv
+
+    def __getattr__(self, name: str):
+        if name not in READ_METHODS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+        def pooled(*args, **kwargs):
+            return self._call(name, *args, **kwargs)
+        pooled.__name__ = name
+        pooled.__doc__ = getattr(IFAPI, name).__doc__
+        return pooled
+
+    def stats(self) -> Dict[str, dict]:
+        """Retrieve per-token usage statistics.
+
+        Returns:
+            Dictionary keyed by token of dictionaries with request, failure
+            and in-flight counts, mean latency and health state.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            return {
+                token: {
+                    "requests": member.requests,
+                    "failures": member.failures,
+                    "in_flight": member.in_flight,
+                    "mean_latency": member.latency / member.requests if member.requests else 0.0,
+                    "state": member.removed or ("suspended" if member.suspended_until > now else "healthy")
+                }
+                for token, member in self._members.items()
+            }
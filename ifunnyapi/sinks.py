@@ -0,0 +1,266 @@
+"""Streaming export sinks for iFunny API items.
+
+Sinks consume any iterable of JSON dictionaries (e.g. the output of
+user_posts, tag_posts or post_comments) and write them incrementally in
+batches, so a crashed NDJSON or SQLite job keeps everything flushed before
+the crash. A Parquet file is only readable once its footer is written by
+close(), so a crashed ParquetSink job loses its output.
+
+Example:
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.sinks import NDJSONSink
+api = IFAPI("token")
+with NDJSONSink("posts.ndjson.gz") as sink:
+    sink.write_all(api.tag_posts(tag="meme"))
+print(sink.items_per_second)
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+import sqlite3
+import time
+from typing import IO, Iterable, List
+
+_COMPRESSORS = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open
+}
+_SUFFIXES = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz"
+}
+
+
+class _Sink:
+    """Private base sink, buffers items and flushes them in batches.
+
+    Sinks may be written from any thread but are not thread-safe; writers
+    on several threads must hold a common lock.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.count = 0
+        self.bytes_written = 0
+        self.elapsed = 0.0
+        self._batch: List[dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_batch(self, batch: List[dict]) -> int:
+        """Write a batch of items, returning the number of bytes written."""
+
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def write(self, item: dict):
+        """Buffer an item, flushing when the batch is full.
+
+        Args:
+            item: JSON dictionary to export.
+        """
+
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, items: Iterable[dict]) -> int:
+        """Export every item of an iterable.
+
+        Args:
+            items: Iterable of JSON dictionaries to export.
+
+        Returns:
+            Number of items written.
+        """
+
+        before = self.count + len(self._batch)
+        for item in items:
+            self.write(item)
+        self.flush()
+        return self.count - before
+
+    def flush(self):
+        """Write all buffered items."""
+
+        if not self._batch:
+            return
+        start = time.perf_counter()
+        self.bytes_written += self._write_batch(self._batch)
+        self.elapsed += time.perf_counter() - start
+        self.count += len(self._batch)
+        self._batch = []
+
+    def close(self):
+        """Flush buffered items and close the sink."""
+
+        self.flush()
+        self._close()
+
+    @property
+    def buffered(self) -> int:
+        """Number of items waiting for the next flush."""
+
+        return len(self._batch)
+
+    @property
+    def items_per_second(self) -> float:
+        """Write throughput, excluding time spent producing items."""
+
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+
+class NDJSONSink(_Sink):
+    """Newline-delimited JSON sink with optional compression."""
+
+    def __init__(self, path: str, compression: str = None, batch_size: int = 1000, append: bool = False):
+        """
+        Args:
+            path: File path to which to write.
+            compression: One of "gzip", "bz2" or "xz". Inferred from the path
+                suffix when not specified.
+            batch_size: Number of items buffered between writes.
+            append: Append to an existing file instead of truncating it.
+        """
+
+        super().__init__(batch_size)
+        if compression is None:
+            compression = next((comp for suffix, comp in _SUFFIXES.items() if path.endswith(suffix)), None)
+        if compression is None:
+            self._file: IO = open(path, "a" if append else "w", encoding="utf-8")
+        elif compression in _COMPRESSORS:
+            self._file = _COMPRESSORS[compression](path, "at" if append else "wt", encoding="utf-8")
+        else:
+            raise ValueError(f"unsupported compression {compression!r}")
+
+    def _write_batch(self, batch: List[dict]) -> int:
+        data = "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in batch)
+        self._file.write(data)
+        self._file.flush()
+        return len(data)
+
+    def _close(self):
+        self._file.close()
+
+
+class SQLiteSink(_Sink):
+    """SQLite sink storing items as JSON, one transaction per batch."""
+
+    def __init__(self, path: str, table: str = "items", key: str = "id", batch_size: int = 1000):
+        """
+        Args:
+            path: SQLite database file path.
+            table: Table into which to write items.
+            key: Item key used as primary key; existing rows are replaced.
+            batch_size: Number of items per transaction.
+        """
+
+        super().__init__(batch_size)
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name {table!r}")
+        self.key = key
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._insert = f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)"
+
+    def _write_batch(self, batch: List[dict]) -> int:
+        rows = [(item.get(self.key), json.dumps(item, separators=(",", ":"))) for item in batch]
+        with self._conn:
+            self._conn.executemany(self._insert, rows)
+        return sum(len(data) for _, data in rows)
+
+    def _close(self):
+        self._conn.close()
+
+
+class ParquetSink(_Sink):
+    """Columnar Parquet sink, one row group per batch.
+
+    Requires the optional pyarrow dependency. Top-level item keys become
+    columns; nested values are stored as JSON strings. Unless given, the
+    schema is inferred from the first batch and then fixed: later unknown
+    keys are dropped, values that do not fit a string column are stored as
+    JSON strings and values that do not fit any other column as null.
+    """
+
+    def __init__(self, path: str, columns: List[str] = None, batch_size: int = 10000, schema=None):
+        """
+        Args:
+            path: Parquet file path.
+            columns: Item keys to export. Inferred from the first batch when
+                not specified.
+            batch_size: Number of items per row group.
+            schema: pyarrow.Schema of the file, its field names are the
+                exported item keys. Inferred from the first batch when not
+                specified.
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise ImportError("ParquetSink requires pyarrow: python -m pip install ifunnyapi[parquet]") from exc
+        super().__init__(batch_size)
+        self.path = path
+        self.columns = schema.names if schema is not None and columns is None else columns
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._schema = schema
+        self._writer = None
+
+    @staticmethod
+    def _scalar(value):
+        return json.dumps(value, separators=(",", ":")) if isinstance(value, (dict, list)) else value
+
+    def _column(self, field, values: list):
+        """Build a column of a schema field, converting mismatched values."""
+
+        pa = self._pa
+        if pa.types.is_string(field.type):
+            values = [val if val is None or isinstance(val, str) else json.dumps(val) for val in values]
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            pass
+
+        def convert(val):
+            try:
+                return pa.scalar(val, type=field.type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                return pa.scalar(None, type=field.type)
+        return pa.array([convert(val) for val in values], type=field.type)
+
+    def _write_batch(self, batch: List[dict]) -> int:
+        pa = self._pa
+        if self.columns is None:
+            self.columns = list(dict.fromkeys(key for item in batch for key in item))
+        data = {col: [self._scalar(item.get(col)) for item in batch] for col in self.columns}
+        if self._schema is None:
+            inferred = pa.Table.from_pydict(data).schema
+            self._schema = pa.schema([
+                pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                for field in inferred
+            ])
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        table = pa.Table.from_arrays([self._column(field, data.get(field.name, [None] * len(batch)))
+                                      for field in self._schema], schema=self._schema)
+        self._writer.write_table(table)
+        return table.nbytes
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
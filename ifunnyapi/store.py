@@ -0,0 +1,352 @@
+"""Local indexed SQLite mirror of iFunny posts, users and comments.
+
+Example:
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.store import IFStore
+store = IFStore("ifunny.db")
+api = IFAPI("token", store=store)
+api.tag_posts(tag="meme", limit=500)
+me = api.account["id"]
+api.user_subscriptions(user_id=me)
+posts = store.posts_by_tag("meme", subscribed_by=me)
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    nick TEXT,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS users_nick ON users (nick);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    creator_id TEXT,
+    date_create INTEGER,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_creator ON posts (creator_id, date_create);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT,
+    user_id TEXT,
+    date INTEGER,
+    fetched REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS comments_user ON comments (user_id, date);
+CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id, date);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    PRIMARY KEY (tag, post_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_post ON tags (post_id);
+CREATE TABLE IF NOT EXISTS smiles (
+    post_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (post_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS smiles_user ON smiles (user_id);
+CREATE TABLE IF NOT EXISTS repubs (
+    post_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (post_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS repubs_user ON repubs (user_id);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    user_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    PRIMARY KEY (user_id, target_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS subscriptions_target ON subscriptions (target_id);
+"""
+
+
+def _dumps(item: dict) -> str:
+    return json.dumps(item, separators=(",", ":"))
+
+
+def _user_id(item: dict) -> Optional[str]:
+    user = item.get("user") or item.get("creator")
+    return user.get("id") if isinstance(user, dict) else None
+
+
+class IFStore:
+    """SQLite store of iFunny entities and smile/repub/subscription edges.
+
+    Every ingest upserts by ID. Lookups return None on a miss, or when the
+    stored row is older than max_age seconds. Users embedded in posts,
+    comments and user lists are abbreviated; they are kept as partial rows
+    that never replace or answer for a full user_info profile.
+    """
+
+    def __init__(self, path: str = ":memory:", max_age: float = None):
+        """
+        Args:
+            path: SQLite database file path.
+            max_age: Seconds after which stored entities are treated as
+                missing by the lookup methods. None never expires entities.
+        """
+
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+        if "partial" not in columns:
+            # Stores created before partial rows existed cannot tell stubs apart
+            self._conn.execute("ALTER TABLE users ADD COLUMN partial INTEGER NOT NULL DEFAULT 1")
+
+    def close(self):
+        """Close the underlying database connection."""
+
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, rows: List[tuple]):
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+
+    def _fetch(self, sql: str, args: tuple) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def _fresh(self) -> float:
+        return 0.0 if self.max_age is None else time.time() - self.max_age
+
+    def upsert_users(self, users: Iterable[dict], partial: bool = False):
+        """Insert or update iFunny users.
+
+        Args:
+            users: JSON dictionaries of iFunny users.
+            partial: The users are abbreviated, e.g. embedded in a post. They
+                are stored only where no full profile is stored.
+        """
+
+        now = time.time()
+        rows = [(user.get("nick"), now, _dumps(user), user["id"]) for user in users if "id" in user]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            if not partial:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO users (nick, fetched, data, id, partial) VALUES (?, ?, ?, ?, 0)", rows
+                )
+                return
+            self._conn.executemany(
+                "UPDATE users SET nick = ?, fetched = ?, data = ? WHERE id = ? AND partial = 1", rows
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO users (nick, fetched, data, id, partial) VALUES (?, ?, ?, ?, 1)", rows
+            )
+
+    def upsert_posts(self, posts: Iterable[dict]):
+        """Insert or update iFunny posts, their creators and their tags.
+
+        Args:
+            posts: JSON dictionaries of iFunny posts.
+        """
+
+        now = time.time()
+        posts = [post for post in posts if "id" in post]
+        self.upsert_users((post["creator"] for post in posts if isinstance(post.get("creator"), dict)),
+                          partial=True)
+        self._write(
+            "INSERT OR REPLACE INTO posts (id, creator_id, date_create, fetched, data) VALUES (?, ?, ?, ?, ?)",
+            [(post["id"], _user_id(post), post.get("date_create"), now, _dumps(post)) for post in posts]
+        )
+        self._write(
+            "INSERT OR IGNORE INTO tags (tag, post_id) VALUES (?, ?)",
+            [(tag.lower(), post["id"]) for post in posts for tag in post.get("tags") or ()]
+        )
+
+    def upsert_comments(self, comments: Iterable[dict], post_id: str = None):
+        """Insert or update iFunny comments and their authors.
+
+        Args:
+            comments: JSON dictionaries of iFunny comments.
+            post_id: iFunny ID of post with comments, used when a comment does
+                not reference its post.
+        """
+
+        now = time.time()
+        comments = [comment for comment in comments if "id" in comment]
+        self.upsert_users((comment["user"] for comment in comments if isinstance(comment.get("user"), dict)),
+                          partial=True)
+        self._write(
+            "INSERT OR REPLACE INTO comments (id, post_id, user_id, date, fetched, data) VALUES (?, ?, ?, ?, ?, ?)",
+            [(comment["id"], comment.get("cid") or post_id, _user_id(comment), comment.get("date"), now,
+              _dumps(comment)) for comment in comments]
+        )
+
+    def add_smiles(self, post_id: str, users: Iterable[dict]):
+        """Record users that smiled a post.
+
+        Args:
+            post_id: iFunny ID of smiled post.
+            users: JSON dictionaries of iFunny users that smiled the post.
+        """
+
+        users = list(users)
+        self.upsert_users(users, partial=True)
+        self._write("INSERT OR IGNORE INTO smiles (post_id, user_id) VALUES (?, ?)",
+                    [(post_id, user["id"]) for user in users if "id" in user])
+
+    def add_repubs(self, post_id: str, users: Iterable[dict]):
+        """Record users that republished a post.
+
+        Args:
+            post_id: iFunny ID of republished post.
+            users: JSON dictionaries of iFunny users that republished the post.
+        """
+
+        users = list(users)
+        self.upsert_users(users, partial=True)
+        self._write("INSERT OR IGNORE INTO repubs (post_id, user_id) VALUES (?, ?)",
+                    [(post_id, user["id"]) for user in users if "id" in user])
+
+    def add_subscriptions(self, user_id: str, targets: Iterable[dict]):
+        """Record users to which a user is subscribed.
+
+        Args:
+            user_id: iFunny ID of subscribing user.
+            targets: JSON dictionaries of iFunny users subscribed to.
+        """
+
+        targets = list(targets)
+        self.upsert_users(targets, partial=True)
+        self._write("INSERT OR IGNORE INTO subscriptions (user_id, target_id) VALUES (?, ?)",
+                    [(user_id, target["id"]) for target in targets if "id" in target])
+
+    def add_subscribers(self, user_id: str, subscribers: Iterable[dict]):
+        """Record users subscribed to a user.
+
+        Args:
+            user_id: iFunny ID of user subscribed to.
+            subscribers: JSON dictionaries of iFunny subscribers.
+        """
+
+        subscribers = list(subscribers)
+        self.upsert_users(subscribers, partial=True)
+        self._write("INSERT OR IGNORE INTO subscriptions (user_id, target_id) VALUES (?, ?)",
+                    [(subscriber["id"], user_id) for subscriber in subscribers if "id" in subscriber])
+
+    def _one(self, sql: str, *args) -> Optional[dict]:
+        rows = self._fetch(sql, args + (self._fresh(),))
+        return json.loads(rows[0][0]) if rows else None
+
+    def user(self, user_id: str) -> Optional[dict]:
+        """Retrieve stored iFunny user by ID."""
+
+        return self._one("SELECT data FROM users WHERE id = ? AND partial = 0 AND fetched >= ?", user_id)
+
+    def user_by_nick(self, nick: str) -> Optional[dict]:
+        """Retrieve stored iFunny user by nickname."""
+
+        return self._one("SELECT data FROM users WHERE nick = ? AND partial = 0 AND fetched >= ? "
+                         "ORDER BY fetched DESC LIMIT 1", nick)
+
+    def post(self, post_id: str) -> Optional[dict]:
+        """Retrieve stored iFunny post by ID."""
+
+        return self._one("SELECT data FROM posts WHERE id = ? AND fetched >= ?", post_id)
+
+    def comment(self, comment_id: str) -> Optional[dict]:
+        """Retrieve stored iFunny comment by ID."""
+
+        return self._one("SELECT data FROM comments WHERE id = ? AND fetched >= ?", comment_id)
+
+    def posts_by_tag(self, tag: str, subscribed_by: str = None, limit: int = None) -> List[dict]:
+        """Retrieve stored posts with a hashtag, newest first.
+
+        Args:
+            tag: Hashtag of iFunny posts.
+            subscribed_by: Only include posts by users to which this user is
+                subscribed.
+            limit: Maximum number of posts to retrieve.
+
+        Returns:
+            List of JSON dictionaries of iFunny posts.
+        """
+
+        sql = "SELECT p.data FROM tags t JOIN posts p ON p.id = t.post_id"
+        args = [tag.lower()]
+        if subscribed_by is not None:
+            sql += " JOIN subscriptions s ON s.target_id = p.creator_id AND s.user_id = ?"
+            args.insert(0, subscribed_by)
+        sql += " WHERE t.tag = ? ORDER BY p.date_create DESC LIMIT ?"
+        args.append(-1 if limit is None else limit)
+        return [json.loads(data) for data, in self._fetch(sql, tuple(args))]
+
+    def posts_by_user(self, user_id: str, since: int = None, limit: int = None) -> List[dict]:
+        """Retrieve stored posts created by a user, newest first.
+
+        Args:
+            user_id: iFunny ID of post creator.
+            since: Only include posts created at or after this Unix time.
+            limit: Maximum number of posts to retrieve.
+
+        Returns:
+            List of JSON dictionaries of iFunny posts.
+        """
+
+        rows = self._fetch(
+            "SELECT data FROM posts WHERE creator_id = ? AND date_create >= ? ORDER BY date_create DESC LIMIT ?",
+            (user_id, since or 0, -1 if limit is None else limit)
+        )
+        return [json.loads(data) for data, in rows]
+
+    def comments_by_user(self, user_id: str, since: int = None, limit: int = None) -> List[dict]:
+        """Retrieve stored comments by a user, newest first.
+
+        Args:
+            user_id: iFunny ID of comment author.
+            since: Only include comments made at or after this Unix time.
+            limit: Maximum number of comments to retrieve.
+
+        Returns:
+            List of JSON dictionaries of iFunny comments.
+        """
+
+        rows = self._fetch(
+            "SELECT data FROM comments WHERE user_id = ? AND date >= ? ORDER BY date DESC LIMIT ?",
+            (user_id, since or 0, -1 if limit is None else limit)
+        )
+        return [json.loads(data) for data, in rows]
+
+    def post_comments(self, post_id: str) -> List[dict]:
+        """Retrieve stored comments on a post, oldest first."""
+
+        rows = self._fetch("SELECT data FROM comments WHERE post_id = ? ORDER BY date", (post_id,))
+        return [json.loads(data) for data, in rows]
+
+    def smiled_posts(self, user_id: str) -> List[str]:
+        """Retrieve iFunny IDs of stored posts smiled by a user."""
+
+        return [post_id for post_id, in self._fetch("SELECT post_id FROM smiles WHERE user_id = ?", (user_id,))]
+
+    def republished_posts(self, user_id: str) -> List[str]:
+        """Retrieve iFunny IDs of stored posts republished by a user."""
+
+        return [post_id for post_id, in self._fetch("SELECT post_id FROM repubs WHERE user_id = ?", (user_id,))]
+
+    def subscriptions(self, user_id: str) -> List[str]:
+        """Retrieve iFunny IDs of users to which a user is subscribed."""
+
+        rows = self._fetch("SELECT target_id FROM subscriptions WHERE user_id = ?", (user_id,))
+        return [target_id for target_id, in rows]
@@ -0,0 +1,334 @@
+"""HTTP transports used by the iFunny API client.
+
+A transport sends one request and returns a TransportResponse. The
+default RequestsTransport keeps HTTP/1.1 connections alive in a pooled
+requests session; HTTPXTransport multiplexes concurrent requests over a
+few HTTP/2 connections and requires the optional httpx[http2] dependency.
+RecordingTransport saves responses to a cassette file that ReplayTransport
+serves back without network access, e.g. to profile the client itself.
+
+Example:
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.transport import HTTPXTransport
+api = IFAPI("token", transport=HTTPXTransport())
+"""
+
+from collections import deque
+import hashlib
+import json
+import struct
+import threading
+import time
+from typing import Callable, Deque, Dict, Generator, NamedTuple
+from urllib.parse import parse_qsl, urlsplit
+import zlib
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .exceptions import CassetteMiss
+from .ratelimit import RateLimiter
+
+# Exceptions raised by transports when a request could not be completed
+TRANSPORT_ERRORS = (requests.RequestException,) + ((httpx.TransportError,) if httpx is not None else ())
+
+
+class TransportResponse(NamedTuple):
+    """Raw response of an iFunny API request."""
+
+    status_code: int
+    content: bytes
+    bytes_out: int
+
+    def json(self) -> dict:
+        """Decode the response body as JSON."""
+
+        return json.loads(self.content)
+
+
+def _body_size(body) -> int:
+    return len(body) if isinstance(body, (bytes, str)) else 0
+
+
+class RequestsTransport:
+    """HTTP/1.1 transport over a keep-alive requests session."""
+
+    def __init__(self, pool_maxsize: int = 32):
+        """
+        Args:
+            pool_maxsize: Maximum number of kept-alive connections per host.
+        """
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, auth: Callable, **kwargs) -> TransportResponse:
+        """Send a request.
+
+        Args:
+            method: HTTP method.
+            url: Absolute request URL.
+            auth: Callable adding authorization to a request.
+            **kwargs: Arbitrary keyword arguments passed to requests.
+
+        Returns:
+            Response status, body and request body size.
+        """
+
+        req = self.session.request(method, url, auth=auth, **kwargs)
+        return TransportResponse(req.status_code, req.content, _body_size(req.request.body))
+
+    def close(self):
+        """Close kept-alive connections."""
+
+        self.session.close()
+
+
+class HTTPXTransport:
+    """HTTP/2 transport multiplexing requests over few connections.
+
+    Keyword arguments follow httpx rather than requests conventions, e.g.
+    follow_redirects instead of allow_redirects.
+    """
+
+    def __init__(self, http2: bool = True, http1: bool = True, max_connections: int = 10, **kwargs):
+        """
+        Args:
+            http2: Negotiate HTTP/2 with the server.
+            http1: Allow HTTP/1.1. Disable to speak HTTP/2 without TLS (h2c
+                prior knowledge), e.g. to a local test server.
+            max_connections: Maximum number of open connections.
+            **kwargs: Arbitrary keyword arguments passed to httpx.Client.
+        """
+
+        if httpx is None:
+            raise ImportError("HTTPXTransport requires httpx: python -m pip install ifunnyapi[http2]")
+        self.client = httpx.Client(http1=http1, http2=http2,
+                                   limits=httpx.Limits(max_connections=max_connections), **kwargs)
+
+    def request(self, method: str, url: str, auth: Callable, **kwargs) -> TransportResponse:
+        """Send a request.
+
+        Args:
+            method: HTTP method.
+            url: Absolute request URL.
+            auth: Callable adding authorization to a request.
+            **kwargs: Arbitrary keyword arguments passed to httpx.
+
+        Returns:
+            Response status, body and request body size.
+        """
+
+        req = self.client.request(method, url, auth=auth, **kwargs)
+        return TransportResponse(req.status_code, req.content, int(req.request.headers.get("Content-Length", 0)))
+
+    def close(self):
+        """Close open connections."""
+
+        self.client.close()
+
+
+class RateLimitedTransport:
+    """Transport wrapper sending at most limiter.rate requests per second."""
+
+    def __init__(self, transport, limiter: RateLimiter):
+        """
+        Args:
+            transport: Transport to which requests are forwarded.
+            limiter: Rate limiter shared by every request.
+        """
+
+        self.transport = transport
+        self.limiter = limiter
+
+    def request(self, method: str, url: str, auth: Callable, **kwargs) -> TransportResponse:
+        """Wait for the rate limiter, then send a request."""
+
+        self.limiter.acquire()
+        return self.transport.request(method, url, auth, **kwargs)
+
+    def close(self):
+        """Close the wrapped transport."""
+
+        self.transport.close()
+
+
+_CASSETTE_MAGIC = b"IFC1"
+_RECORD_HEADER = struct.Struct("<I")
+
+
+class CassetteRecord(NamedTuple):
+    """Recorded request and its response."""
+
+    method: str
+    url: str
+    key: str
+    status_code: int
+    content: bytes
+    bytes_out: int
+    latency: float
+
+
+def request_key(method: str, url: str, **kwargs) -> str:
+    """Identify a request by method, path, sorted query and body.
+
+    The scheme and host are ignored so a cassette recorded against one base
+    URL replays against any other.
+
+    Args:
+        method: HTTP method.
+        url: Absolute request URL.
+        **kwargs: Keyword arguments of the request, of which params, data,
+            json and the field names of files are used.
+
+    Returns:
+        Hex digest identifying the request.
+    """
+
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    extra = kwargs.get("params") or {}
+    params += [(str(name), str(value)) for name, value in (extra.items() if isinstance(extra, dict) else extra)]
+    data = kwargs.get("data")
+    if isinstance(data, dict):
+        data = sorted((str(name), str(value)) for name, value in data.items())
+    elif isinstance(data, bytes):
+        data = data.decode("latin-1")
+    files = kwargs.get("files") or {}
+    body = [data, kwargs.get("json"), sorted(files) if isinstance(files, dict) else sorted(name for name, _ in files)]
+    blob = json.dumps([method.upper(), parts.path, sorted(params), body], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+def iter_cassette(path: str) -> Generator[CassetteRecord, None, None]:
+    """Read the records of a cassette file in recording order.
+
+    Args:
+        path: Cassette file path.
+
+    Returns:
+        Generator of recorded requests and responses.
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(_CASSETTE_MAGIC)) != _CASSETTE_MAGIC:
+            raise ValueError(f"{path!r} is not an ifunnyapi cassette")
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            size, = _RECORD_HEADER.unpack(header)
+            blob = f.read(size)
+            if len(blob) < size:
+                # Truncated by a crash while recording
+                return
+            meta, _, content = zlib.decompress(blob).partition(b"\n")
+            method, url, key, status, bytes_out, latency = json.loads(meta)
+            yield CassetteRecord(method, url, key, status, content, bytes_out, latency)
+
+
+class RecordingTransport:
+    """Transport wrapper appending every response to a cassette file.
+
+    Each record is the request method, URL and key followed by the response
+    status and body, compressed with zlib and prefixed by its length.
+    """
+
+    def __init__(self, transport, path: str, append: bool = False):
+        """
+        Args:
+            transport: Transport to which requests are forwarded.
+            path: Cassette file path.
+            append: Append to an existing cassette instead of truncating it.
+        """
+
+        self.transport = transport
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab" if append else "wb")
+        if self._file.tell() == 0:
+            self._file.write(_CASSETTE_MAGIC)
+
+    def request(self, method: str, url: str, auth: Callable, **kwargs) -> TransportResponse:
+        """Send a request and record its response."""
+
+        start = time.perf_counter()
+        resp = self.transport.request(method, url, auth, **kwargs)
+        latency = time.perf_counter() - start
+        meta = json.dumps([method.upper(), url, request_key(method, url, **kwargs), resp.status_code,
+                           resp.bytes_out, round(latency, 6)], separators=(",", ":"))
+        blob = zlib.compress(meta.encode() + b"\n" + resp.content)
+        with self._lock:
+            self._file.write(_RECORD_HEADER.pack(len(blob)) + blob)
+            self._file.flush()
+            self.records += 1
+        return resp
+
+    def close(self):
+        """Close the cassette file and the wrapped transport."""
+
+        with self._lock:
+            self._file.close()
+        self.transport.close()
+
+
+class ReplayTransport:
+    """Transport serving recorded responses without network access.
+
+    Responses are matched on request_key(). Requests recorded several
+    times, e.g. feed reads, are answered with their responses in recording
+    order, starting over once all were served.
+    """
+
+    def __init__(self, path: str, latency: float = 0.0, timing: float = None):
+        """
+        Args:
+            path: Cassette file path.
+            latency: Seconds each response is delayed.
+            timing: If specified, delay each response by its recorded
+                latency multiplied by timing instead, e.g. 1.0 replays at the
+                recorded speed.
+        """
+
+        self.latency = latency
+        self.timing = timing
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._responses: Dict[str, Deque[CassetteRecord]] = {}
+        for record in iter_cassette(path):
+            self._responses.setdefault(record.key, deque()).append(record)
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._responses.values())
+
+    def request(self, method: str, url: str, auth: Callable, **kwargs) -> TransportResponse:
+        """Serve the next recorded response of a request.
+
+        Raises:
+            CassetteMiss: If the request was never recorded.
+        """
+
+        key = request_key(method, url, **kwargs)
+        with self._lock:
+            records = self._responses.get(key)
+            if not records:
+                raise CassetteMiss(method, url)
+            record = records[0]
+            records.rotate(-1)
+            self.requests += 1
+        delay = record.latency * self.timing if self.timing is not None else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        return TransportResponse(record.status_code, record.content, record.bytes_out)
+
+    def close(self):
+        """Nothing to close, replay holds no connections."""
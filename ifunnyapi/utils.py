@@ -1,7 +1,18 @@
 """Miscellaneous ifunnyapi utilities."""
 
 from functools import wraps
-from .exceptions import APIError
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+from .exceptions import APIError, DeadlineExceeded
+
+
+def raise_for_error(retv: dict) -> dict:
+    """Raise APIError if an iFunny API response is an error."""
+
+    if "error" in retv:
+        raise APIError(retv["status"], retv["error_description"])
+    return retv
 
 
 def api_request(func):
@@ -9,8 +20,193 @@ def api_request(func):
 
     @wraps(func)
     def decorated(*args, **kwargs):
-        retv = func(*args, **kwargs)
-        if "error" in retv:
-            raise APIError(retv["status"], retv["error_description"])
-        return retv
+        return raise_for_error(func(*args, **kwargs))
     return decorated
+
+
+def freeze(value: Any) -> Hashable:
+    """Convert nested dicts, lists and sets into a hashable key.
+
+    Raises:
+        TypeError: Value contains an unhashable object.
+    """
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(val) for val in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(val) for val in value)
+    hash(value)
+    return value
+
+
+class _Flight:
+    """Call in progress and its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one call.
+
+    Callers arriving while a call with their key is in flight wait for it
+    and share its result (the same object) or exception.
+
+    Attributes:
+        leaders: Number of calls actually made.
+        coalesced: Number of calls served by another caller's call.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any], timeout: float = None) -> Any:
+        """Call func, unless a call with the same key is already in flight.
+
+        Args:
+            key: Identity of the call.
+            func: Callable performing the call.
+            timeout: Maximum seconds to wait for an in-flight call.
+
+        Returns:
+            Result of func or of the in-flight call.
+
+        Raises:
+            DeadlineExceeded: The in-flight call did not finish in time.
+        """
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise DeadlineExceeded()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Retrieve leader and coalesced call counters."""
+
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._flights)}
+
+
+class PagingStats:
+    """Thread-safe counters of paging requests and retrieved items."""
+
+    def __init__(self):
+        self.requests = 0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def record(self, items: int):
+        """Count one paging request that retrieved items."""
+
+        with self._lock:
+            self.requests += 1
+            self.items += items
+
+    def reset(self):
+        """Zero all counters."""
+
+        with self._lock:
+            self.requests = self.items = 0
+
+    @property
+    def requests_per_item(self) -> float:
+        """Paging requests sent per retrieved item."""
+
+        return self.requests / self.items if self.items else float(self.requests)
+
+
+class Deadline:
+    """Operation-level time budget and cancellation token.
+
+    Pass as deadline=... to any IFAPI method. Each underlying request gets
+    at most the remaining budget as its timeout, and no request is started
+    once the deadline has expired or been cancelled. Multi-request methods
+    then stop and return partial results.
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        Args:
+            timeout: Seconds from now until the deadline expires. None only
+                allows cancellation.
+        """
+
+        self.expires = None if timeout is None else time.monotonic() + timeout
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancel the operation, e.g. from another thread."""
+
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True if cancel() was called."""
+
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, None if there is no time limit."""
+
+        return None if self.expires is None else max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """True if the deadline passed or the operation was cancelled."""
+
+        return self.cancelled or self.remaining() == 0.0
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline expired or was cancelled."""
+
+        if self.cancelled:
+            raise DeadlineExceeded(cancelled=True)
+        if self.remaining() == 0.0:
+            raise DeadlineExceeded()
+
+    def timeout(self, timeout: Any = None) -> Any:
+        """Clamp a requests timeout to the remaining budget.
+
+        Args:
+            timeout: Timeout already requested, a number or (connect, read)
+                tuple.
+
+        Returns:
+            Timeout no longer than the remaining budget.
+        """
+
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
@@ -0,0 +1,292 @@
+"""Multiplexed polling of many iFunny streams with adaptive intervals.
+
+A WatchScheduler polls any number of watches from one scheduler thread and
+a shared worker pool. Each watch backs off while its stream is quiet and
+polls more often while it is active, and all watches share one request
+budget. New items go to the watch callback, or to the scheduler queue.
+
+Example:
+
+from ifunnyapi.api import IFAPI
+from ifunnyapi.watch import WatchScheduler
+api = IFAPI("token")
+scheduler = WatchScheduler(api, rate=2)
+scheduler.watch_tag("meme", callback=lambda watch, items: print(watch.name, len(items)))
+scheduler.watch_activity()
+scheduler.start()
+name, item = scheduler.queue.get()
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .endpoints import MY_ACTIVITY
+from .ratelimit import RateLimiter
+from .workqueue import paging_source
+
+
+def _item_key(item: dict) -> Hashable:
+    if "id" in item:
+        return item["id"]
+    return json.dumps(item, sort_keys=True, separators=(",", ":"))
+
+
+class Watch:
+    """Stream polled by a WatchScheduler.
+
+    Attributes:
+        name: Unique watch name.
+        interval: Current seconds between polls.
+        polls: Number of completed polls.
+        new_items: Number of delivered items.
+        errors: Number of failed polls.
+        last_error: Exception of the last failed poll.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[], List[dict]],
+                 callback: Callable[["Watch", List[dict]], Any] = None, min_interval: float = 5.0,
+                 max_interval: float = 300.0, key: Callable[[dict], Hashable] = _item_key,
+                 deliver_existing: bool = False, max_seen: int = 5000):
+        """
+        Args:
+            name: Unique watch name.
+            fetch: Callable retrieving the latest items of the stream.
+            callback: Callable receiving the watch and its new items. New
+                items go to the scheduler queue when not specified.
+            min_interval: Minimum seconds between polls.
+            max_interval: Maximum seconds between polls.
+            key: Callable identifying an item, by default its "id".
+            deliver_existing: Deliver items present at the first poll.
+            max_seen: Number of item keys remembered for deduplication.
+        """
+
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("invalid watch intervals")
+        self.name = name
+        self.fetch = fetch
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.key = key
+        self.max_seen = max_seen
+        self.interval = min_interval
+        self.polls = 0
+        self.new_items = 0
+        self.errors = 0
+        self.last_error: Optional[Exception] = None
+        self._primed = deliver_existing
+        self._seen: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def _filter_new(self, items: List[dict]) -> List[dict]:
+        """Remember items, returning the ones not seen before."""
+
+        new = []
+        for item in items:
+            key = self.key(item)
+            if key in self._seen:
+                continue
+            self._seen[key] = None
+            new.append(item)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        if not self._primed:
+            self._primed = True
+            return []
+        return new
+
+
+class WatchScheduler:
+    """Poll many watches on one scheduler thread and worker pool."""
+
+    def __init__(self, api, rate: float = None, max_workers: int = 4, backoff: float = 1.5,
+                 speedup: float = 0.5, page_size: int = 30):
+        """
+        Args:
+            api: IFAPI instance used by the watch helpers.
+            rate: Global poll budget in requests per second. None disables
+                the budget.
+            max_workers: Maximum number of concurrent polls.
+            backoff: Interval multiplier after a poll without new items.
+            speedup: Interval multiplier after a poll with new items.
+            page_size: Number of latest items fetched by watch helpers.
+        """
+
+        self.api = api
+        self.budget = RateLimiter(rate) if rate else None
+        self.backoff = backoff
+        self.speedup = speedup
+        self.page_size = page_size
+        self.queue: "queue.Queue" = queue.Queue()
+        self.watches: Dict[str, Watch] = {}
+        self._max_workers = max_workers
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, watch: Watch) -> Watch:
+        """Schedule a watch to be polled immediately and then adaptively.
+
+        Args:
+            watch: Watch to schedule.
+
+        Returns:
+            Scheduled watch.
+        """
+
+        with self._cond:
+            if watch.name in self.watches:
+                raise ValueError(f"watch {watch.name!r} already exists")
+            self.watches[watch.name] = watch
+            heapq.heappush(self._heap, (time.monotonic(), next(self._counter), watch))
+            self._cond.notify()
+        return watch
+
+    def remove(self, name: str):
+        """Stop polling a watch.
+
+        Args:
+            name: Name of watch to remove.
+        """
+
+        with self._cond:
+            del self.watches[name]
+
+    def _paged_watch(self, name: str, kind: str, target: str, **kwargs) -> Watch:
+        path, key, params = paging_source(kind, target)
+        return self.add(Watch(name, lambda: self.api._get_paging_page(path, key, None, self.page_size, params)[0],
+                              **kwargs))
+
+    def watch_tag(self, tag: str, **kwargs) -> Watch:
+        """Watch new posts with a hashtag.
+
+        Args:
+            tag: Hashtag of iFunny posts.
+            **kwargs: Arbitrary keyword arguments passed to Watch.
+        """
+
+        return self._paged_watch(f"tag:{tag}", "tag_posts", tag, **kwargs)
+
+    def watch_user_posts(self, user_id: str, **kwargs) -> Watch:
+        """Watch new posts of a user.
+
+        Args:
+            user_id: iFunny ID of user.
+            **kwargs: Arbitrary keyword arguments passed to Watch.
+        """
+
+        return self._paged_watch(f"user_posts:{user_id}", "user_posts", user_id, **kwargs)
+
+    def watch_post_comments(self, post_id: str, **kwargs) -> Watch:
+        """Watch new comments on a post.
+
+        Args:
+            post_id: iFunny ID of post.
+            **kwargs: Arbitrary keyword arguments passed to Watch.
+        """
+
+        return self._paged_watch(f"post_comments:{post_id}", "post_comments", post_id, **kwargs)
+
+    def watch_activity(self, **kwargs) -> Watch:
+        """Watch new iFunny account activity.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments passed to Watch.
+        """
+
+        return self.add(Watch("activity", lambda: self.api._get_paging_page(MY_ACTIVITY, "news", None,
+                                                                            self.page_size)[0], **kwargs))
+
+    def _poll(self, watch: Watch):
+        try:
+            new = watch._filter_new(watch.fetch())
+        except Exception as exc:
+            watch.errors += 1
+            watch.last_error = exc
+            new = []
+        watch.polls += 1
+        if new:
+            watch.new_items += len(new)
+            watch.interval = max(watch.min_interval, watch.interval * self.speedup)
+            if watch.callback is not None:
+                try:
+                    watch.callback(watch, new)
+                except Exception as exc:
+                    watch.errors += 1
+                    watch.last_error = exc
+            else:
+                for item in new:
+                    self.queue.put((watch.name, item))
+        else:
+            watch.interval = min(watch.max_interval, watch.interval * self.backoff)
+        with self._cond:
+            if self.watches.get(watch.name) is watch:
+                heapq.heappush(self._heap, (time.monotonic() + watch.interval, next(self._counter), watch))
+                self._cond.notify()
+
+    def run(self, duration: float = None):
+        """Poll watches on the calling thread until stop() or duration.
+
+        Args:
+            duration: Seconds to run for. None runs until stop().
+        """
+
+        until = None if duration is None else time.monotonic() + duration
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while not self._stopped.is_set():
+                with self._cond:
+                    now = time.monotonic()
+                    if until is not None and now >= until:
+                        break
+                    if not self._heap or self._heap[0][0] > now:
+                        wait = self._heap[0][0] - now if self._heap else None
+                        if until is not None:
+                            wait = until - now if wait is None else min(wait, until - now)
+                        self._cond.wait(wait)
+                        continue
+                    _, _, watch = heapq.heappop(self._heap)
+                    if self.watches.get(watch.name) is not watch:
+                        continue
+                if self.budget is not None:
+                    while not self.budget.acquire(timeout=0.5):
+                        if self._stopped.is_set():
+                            return
+                executor.submit(self._poll, watch)
+
+    def start(self):
+        """Poll watches on a background thread."""
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, name="ifunnyapi-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop polling.
+
+        Args:
+            wait: Wait for the background thread and running polls to finish.
+        """
+
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict[str, dict]:
+        """Retrieve per-watch poll statistics."""
+
+        with self._cond:
+            return {
+                name: {"interval": watch.interval, "polls": watch.polls, "new_items": watch.new_items,
+                       "errors": watch.errors}
+                for name, watch in self.watches.items()
+            }
@@ -0,0 +1,373 @@
+"""Durable leased work queue for sharded multi-process crawling.
+
+Work units are stored in a SQLite file. Worker processes, on one host or
+on several hosts sharing the file, claim units with time-limited leases,
+write the paging cursor back after every page and mark units done. A unit
+whose worker dies is claimed again once its lease expires and resumes from
+the last written cursor. Every (kind, target) pair is queued at most once.
+
+Example:
+
+from ifunnyapi.workqueue import WorkQueue, run_workers
+
+def handle(unit, items):
+    ...  # Runs in worker processes, must be a module-level function
+
+queue = WorkQueue("crawl.db")
+queue.put_many("user_posts", user_ids)
+queue.put("tag_posts", "meme")
+run_workers("token", "crawl.db", handle, processes=8)
+"""
+
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .endpoints import (
+    USER_SUBSCRIBERS,
+    USER_SUBSCRIPTIONS,
+    USER_POSTS,
+    USER_FEATURES,
+    USER_GUESTS,
+    CHANNEL_POSTS,
+    SEARCH_POSTS,
+    POST_COMMENTS,
+    POST_SMILES_USERS,
+    POST_REPUBS_USERS
+)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Paged method name -> (endpoint path template, response key)
+PAGED_KINDS = {
+    "user_subscribers": (USER_SUBSCRIBERS, "users"),
+    "user_subscriptions": (USER_SUBSCRIPTIONS, "users"),
+    "user_posts": (USER_POSTS, "content"),
+    "user_features": (USER_FEATURES, "content"),
+    "user_guests": (USER_GUESTS, "guests"),
+    "channel_posts": (CHANNEL_POSTS, "content"),
+    "tag_posts": (SEARCH_POSTS, "content"),
+    "post_comments": (POST_COMMENTS, "comments"),
+    "post_smiles_users": (POST_SMILES_USERS, "users"),
+    "post_repubs_users": (POST_REPUBS_USERS, "users")
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    cursor TEXT,
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    items INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    UNIQUE (kind, target)
+);
+CREATE INDEX IF NOT EXISTS units_state ON units (state, lease_expires);
+"""
+
+
+def paging_source(kind: str, target: str) -> Tuple[str, str, dict]:
+    """Resolve a paged method and its target to an iFunny request.
+
+    Args:
+        kind: Paged IFAPI method name, e.g. "user_posts" or "tag_posts".
+        target: User ID, post ID, channel ID or hashtag the method pages.
+
+    Returns:
+        Tuple of endpoint path, response key and extra query parameters.
+    """
+
+    try:
+        template, key = PAGED_KINDS[kind]
+    except KeyError:
+        raise ValueError(f"unsupported paged method {kind!r}") from None
+    if kind == "tag_posts":
+        return template, key, {"counters": "content", "tag": target}
+    return template.format(target), key, {}
+
+
+class WorkUnit(NamedTuple):
+    """Claimed work unit."""
+
+    id: int
+    kind: str
+    target: str
+    cursor: Optional[str]
+    owner: str
+    attempts: int
+    items: int
+
+
+def default_owner() -> str:
+    """Identify the current host, process and thread as lease owner."""
+
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class WorkQueue:
+    """SQLite-backed queue of paged crawl targets with leases.
+
+    The database uses the rollback journal rather than WAL so it can be
+    shared between hosts through a filesystem with working file locks.
+    Open one WorkQueue per process.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 120.0, max_attempts: int = 3):
+        """
+        Args:
+            path: SQLite database file path.
+            lease_seconds: Seconds a claim is valid without a checkpoint.
+            max_attempts: Claims after which a failing unit is marked failed.
+        """
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the underlying database connection."""
+
+        self._conn.close()
+
+    def put(self, kind: str, target: str) -> bool:
+        """Queue a paged method for a target.
+
+        Args:
+            kind: Paged IFAPI method name, e.g. "user_posts".
+            target: User ID, post ID, channel ID or hashtag.
+
+        Returns:
+            True if queued, False if the unit already existed.
+        """
+
+        paging_source(kind, target)
+        cur = self._conn.execute("INSERT OR IGNORE INTO units (kind, target) VALUES (?, ?)", (kind, target))
+        return cur.rowcount == 1
+
+    def put_many(self, kind: str, targets: Iterable[str]) -> int:
+        """Queue a paged method for many targets in one transaction.
+
+        Returns:
+            Number of newly queued units.
+        """
+
+        paging_source(kind, "")
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO units (kind, target) VALUES (?, ?)",
+                                   ((kind, target) for target in targets))
+            queued = self._conn.total_changes - before
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return queued
+
+    def claim(self, owner: str = None) -> Optional[WorkUnit]:
+        """Lease the oldest pending unit, or a unit whose lease expired.
+
+        Args:
+            owner: Lease owner identifier, defaults to default_owner().
+
+        Returns:
+            Claimed unit, None if no unit is available.
+        """
+
+        owner = owner or default_owner()
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT id, kind, target, cursor, attempts, items FROM units "
+                "WHERE state = ? OR (state = ? AND lease_expires < ?) ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now)
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            uid, kind, target, cursor, attempts, items = row
+            self._conn.execute(
+                "UPDATE units SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (LEASED, owner, now + self.lease_seconds, uid)
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return WorkUnit(uid, kind, target, cursor, owner, attempts + 1, items)
+
+    def checkpoint(self, unit: WorkUnit, cursor: Optional[str], items: int) -> bool:
+        """Write back a unit's cursor and renew its lease.
+
+        Args:
+            unit: Claimed unit.
+            cursor: Cursor of the next page to fetch.
+            items: Number of items processed since the last checkpoint.
+
+        Returns:
+            True if the lease is still held, False if it was lost to another
+            worker, in which case the caller must stop processing the unit.
+        """
+
+        cur = self._conn.execute(
+            "UPDATE units SET cursor = ?, items = items + ?, lease_expires = ? "
+            "WHERE id = ? AND owner = ? AND state = ?",
+            (cursor, items, time.time() + self.lease_seconds, unit.id, unit.owner, LEASED)
+        )
+        return cur.rowcount == 1
+
+    def complete(self, unit: WorkUnit) -> bool:
+        """Mark a claimed unit as done.
+
+        Returns:
+            True if the lease was still held.
+        """
+
+        cur = self._conn.execute(
+            "UPDATE units SET state = ?, lease_expires = NULL WHERE id = ? AND owner = ? AND state = ?",
+            (DONE, unit.id, unit.owner, LEASED)
+        )
+        return cur.rowcount == 1
+
+    def fail(self, unit: WorkUnit, error: str):
+        """Release a claimed unit after an error.
+
+        The unit is retried from its last cursor until max_attempts claims,
+        then marked failed.
+        """
+
+        state = FAILED if unit.attempts >= self.max_attempts else PENDING
+        self._conn.execute(
+            "UPDATE units SET state = ?, error = ?, lease_expires = NULL WHERE id = ? AND owner = ? AND state = ?",
+            (state, error, unit.id, unit.owner, LEASED)
+        )
+
+    def release(self, unit: WorkUnit):
+        """Return a claimed unit to the queue without counting a failure.
+
+        The unit resumes from its last checkpointed cursor when claimed again.
+        """
+
+        self._conn.execute(
+            "UPDATE units SET state = ?, attempts = attempts - 1, lease_expires = NULL "
+            "WHERE id = ? AND owner = ? AND state = ?",
+            (PENDING, unit.id, unit.owner, LEASED)
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """Retrieve number of units per state."""
+
+        rows = self._conn.execute("SELECT state, COUNT(*) FROM units GROUP BY state").fetchall()
+        return dict(rows)
+
+
+def run_worker(api, queue: WorkQueue, handler: Callable[[WorkUnit, List[dict]], None],
+               owner: str = None, page_size: int = 100, max_units: int = None, limit: int = None,
+               stop: threading.Event = None, **kwargs) -> int:
+    """Claim and process units until the queue is drained.
+
+    Pages are fetched from each unit's stored cursor. The handler is called
+    once per page before the cursor is checkpointed, so a page is only
+    handled again if a worker dies between the two. Pages are fetched with
+    the same paging loop as the IFAPI paged methods, so posts also reach
+    the client's store.
+
+    Args:
+        api: IFAPI instance used to fetch pages.
+        queue: Work queue from which to claim units.
+        handler: Callable receiving the unit and the items of each page.
+        owner: Lease owner identifier, defaults to default_owner().
+        page_size: Number of items per request, at most PAGE_SIZE.
+        max_units: Stop after this many units.
+        limit: Number of items to process per unit. None processes all.
+        stop: Event checked after every page. Once set, the current unit is
+            released at its last checkpoint and the worker returns.
+        **kwargs: Arbitrary keyword arguments passed to requests.
+
+    Returns:
+        Number of completed units.
+    """
+
+    owner = owner or default_owner()
+    completed = 0
+    while max_units is None or completed < max_units:
+        if stop is not None and stop.is_set():
+            break
+        unit = queue.claim(owner)
+        if unit is None:
+            break
+        if limit is not None and unit.items >= limit:
+            if queue.complete(unit):
+                completed += 1
+            continue
+        path, key, params = paging_source(unit.kind, unit.target)
+        remaining = None if limit is None else limit - unit.items
+        pages = api._iter_paging_pages(path, key, remaining, params, page_size, cursor=unit.cursor, **kwargs)
+        try:
+            for items, cursor in pages:
+                handler(unit, items)
+                if not queue.checkpoint(unit, cursor, len(items)):
+                    break
+                if stop is not None and stop.is_set() and cursor is not None:
+                    queue.release(unit)
+                    return completed
+            else:
+                if queue.complete(unit):
+                    completed += 1
+        except Exception as exc:
+            queue.fail(unit, f"{type(exc).__name__}: {exc}")
+        finally:
+            pages.close()
+    return completed
+
+
+def _worker_main(token: str, queue_path: str, handler: Callable, lease_seconds: float,
+                 page_size: int, api_kwargs: dict):
+    from .api import IFAPI
+
+    queue = WorkQueue(queue_path, lease_seconds)
+    try:
+        run_worker(IFAPI(token, **api_kwargs), queue, handler, page_size=page_size)
+    finally:
+        queue.close()
+
+
+def run_workers(token: str, queue_path: str, handler: Callable[[WorkUnit, List[dict]], None],
+                processes: int = None, lease_seconds: float = 120.0, page_size: int = 100, **kwargs):
+    """Drain a work queue with several worker processes.
+
+    Run this on every host sharing the queue file to scale across machines.
+
+    Args:
+        token: iFunny bearer token used by every worker.
+        queue_path: SQLite work queue file path.
+        handler: Picklable callable receiving each unit and page of items.
+        processes: Number of worker processes, defaults to the CPU count.
+        lease_seconds: Seconds a claim is valid without a checkpoint.
+        page_size: Number of items per request.
+        **kwargs: Arbitrary keyword arguments passed to IFAPI.
+    """
+
+    workers = [
+        multiprocessing.Process(target=_worker_main,
+                                args=(token, queue_path, handler, lease_seconds, page_size, kwargs))
+        for _ in range(processes or os.cpu_count() or 1)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
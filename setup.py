@@ -14,8 +14,15 @@ setuptools.setup(
         "pillow",
         "requests"
     ],
+    extras_require={
+        "http2": ["httpx[http2]"],
+        "parquet": ["pyarrow"]
+    },
     url="https://github.com/EamonTracey/ifunnyapi",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=("benchmarks", "tests")),
+    entry_points={
+        "console_scripts": ["ifunnyapi=ifunnyapi.cli:main"]
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
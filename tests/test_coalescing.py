@@ -0,0 +1,129 @@
+"""Request coalescing of concurrent identical GETs against the local mock server."""
+
+import threading
+import time
+import unittest
+
+import requests
+
+from benchmarks.mockserver import MockConfig, serve_in_thread
+from ifunnyapi.api import IFAPI
+from ifunnyapi.exceptions import DeadlineExceeded
+from ifunnyapi.transport import RequestsTransport
+from ifunnyapi.utils import Deadline
+
+USER_ID = "0000000100000000000000aa"
+
+
+class _GatedTransport(RequestsTransport):
+    """Transport holding every request until the gate is opened."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, auth, **kwargs):
+        with self._lock:
+            self.requests += 1
+        self.gate.wait(5)
+        return super().request(method, url, auth, **kwargs)
+
+
+class _TimeoutOnceTransport(RequestsTransport):
+    """Transport failing its first request with a timeout once the gate is opened."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.requests = 0
+
+    def request(self, method, url, auth, **kwargs):
+        self.requests += 1
+        if self.requests == 1:
+            self.gate.wait(5)
+            raise requests.Timeout("timed out")
+        return super().request(method, url, auth, **kwargs)
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.01)
+
+
+class CoalescingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base = serve_in_thread(MockConfig(items=250, payload_bytes=0))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _run(self, func, count: int):
+        results = [None] * count
+        errors = [None] * count
+
+        def target(i):
+            try:
+                results[i] = func(i)
+            except Exception as exc:
+                errors[i] = exc
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_user_info_shares_one_request(self):
+        transport = _GatedTransport()
+        api = IFAPI("token", base=self.base, transport=transport)
+        threads, results, errors = self._run(lambda _: api.user_info(user_id=USER_ID), 8)
+        _wait_for(lambda: api.flights.stats()["coalesced"] == 7)
+        transport.gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [None] * 8)
+        self.assertEqual(transport.requests, 1)
+        self.assertTrue(all(user is results[0] for user in results))
+        transport.close()
+
+    def test_popular_is_not_coalesced(self):
+        transport = _GatedTransport()
+        api = IFAPI("token", base=self.base, transport=transport)
+        threads, results, errors = self._run(lambda _: [post["id"] for post in api.popular(10)], 2)
+        _wait_for(lambda: transport.requests == 2)
+        transport.gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [None, None])
+        self.assertEqual(api.flights.stats()["coalesced"], 0)
+        self.assertFalse(set(results[0]) & set(results[1]))
+        transport.close()
+
+    def test_follower_survives_leader_deadline(self):
+        transport = _TimeoutOnceTransport()
+        api = IFAPI("token", base=self.base, transport=transport)
+        deadline = Deadline()
+        leader, _, leader_errors = self._run(lambda _: api.user_info(user_id=USER_ID, deadline=deadline), 1)
+        _wait_for(lambda: transport.requests == 1)
+        follower, follower_results, follower_errors = self._run(lambda _: api.user_info(user_id=USER_ID), 1)
+        _wait_for(lambda: api.flights.stats()["coalesced"] == 1)
+        deadline.cancel()
+        transport.gate.set()
+        for thread in leader + follower:
+            thread.join()
+        self.assertIsInstance(leader_errors[0], DeadlineExceeded)
+        self.assertIsNone(follower_errors[0])
+        self.assertEqual(follower_results[0]["id"], USER_ID)
+        self.assertEqual(transport.requests, 2)
+        transport.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Paging round trips against the local mock iFunny server."""
+
+import unittest
+
+from benchmarks.mockserver import MockConfig, serve_in_thread
+from ifunnyapi.api import IFAPI
+from ifunnyapi.endpoints import SEARCH_POSTS
+from ifunnyapi.transport import RequestsTransport
+
+ITEMS = 250
+USER_ID = "0000000100000000000000ff"
+
+
+class _ParamsTransport(RequestsTransport):
+    """Transport remembering the path and query parameters of each request."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def request(self, method, url, auth, **kwargs):
+        self.sent.append((url, dict(kwargs.get("params") or {})))
+        return super().request(method, url, auth, **kwargs)
+
+
+class PagingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base = serve_in_thread(MockConfig(items=ITEMS, payload_bytes=0))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.transport = _ParamsTransport()
+        self.api = IFAPI("token", base=self.base, transport=self.transport)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def assertPaging(self, limit, items, requests):
+        self.api.paging_stats.reset()
+        posts = self.api.user_posts(user_id=USER_ID, limit=limit)
+        self.assertEqual(len(posts), items)
+        self.assertEqual(len({post["id"] for post in posts}), items)
+        self.assertEqual(self.api.paging_stats.requests, requests)
+        self.assertEqual(self.api.paging_stats.items, items)
+
+    def test_no_limit(self):
+        self.assertPaging(None, ITEMS, 3)
+
+    def test_zero_limit(self):
+        self.assertPaging(0, 0, 0)
+
+    def test_one(self):
+        self.assertPaging(1, 1, 1)
+
+    def test_one_page(self):
+        self.assertPaging(100, 100, 1)
+
+    def test_partial_last_page(self):
+        self.assertPaging(150, 150, 2)
+
+    def test_page_multiple(self):
+        self.assertPaging(200, 200, 2)
+
+    def test_limit_past_end(self):
+        self.assertPaging(300, ITEMS, 3)
+
+    def test_exact_request_sizes(self):
+        self.api.user_posts(user_id=USER_ID, limit=150)
+        self.assertEqual([params["limit"] for _, params in self.transport.sent], [100, 50])
+
+    def test_tag_posts_params(self):
+        posts = self.api.tag_posts(tag="meme", limit=150)
+        self.assertEqual(len(posts), 150)
+        self.assertEqual(len(self.transport.sent), 2)
+        for url, params in self.transport.sent:
+            self.assertTrue(url.endswith(SEARCH_POSTS))
+            self.assertEqual(params["tag"], "meme")
+            self.assertEqual(params["counters"], "content")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""IFAPIPool token health and rate limiting against the local mock server."""
+
+import json
+import time
+import unittest
+
+from benchmarks.mockserver import MockConfig, serve_in_thread
+from ifunnyapi.exceptions import APIError
+from ifunnyapi.pool import IFAPIPool
+from ifunnyapi.transport import RequestsTransport, TransportResponse
+
+BLOCKER_ID = "0000000100000000000000bb"
+USER_ID = "0000000100000000000000aa"
+
+
+def _error(status: int, desc: str) -> TransportResponse:
+    content = json.dumps({"error": "error", "error_description": desc, "status": status}).encode()
+    return TransportResponse(status, content, 0)
+
+
+class _FaultyTransport(RequestsTransport):
+    """Transport answering 403 for one user and 401 for revoked tokens."""
+
+    def __init__(self, revoked=()):
+        super().__init__()
+        self.revoked = set(revoked)
+        self.requests = 0
+
+    def request(self, method, url, auth, **kwargs):
+        self.requests += 1
+        if auth.token in self.revoked:
+            return _error(401, "invalid token")
+        if BLOCKER_ID in url:
+            return _error(403, "user blocked you")
+        return super().request(method, url, auth, **kwargs)
+
+
+class PoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base = serve_in_thread(MockConfig(items=1000, payload_bytes=0))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_forbidden_resource_keeps_tokens(self):
+        transport = _FaultyTransport()
+        pool = IFAPIPool(["a", "b", "c"], base=self.base, transport=transport)
+        with self.assertRaises(APIError) as ctx:
+            pool.user_info(user_id=BLOCKER_ID)
+        self.assertEqual(ctx.exception.status, 403)
+        self.assertEqual(transport.requests, 1)
+        self.assertEqual(sorted(pool.tokens), ["a", "b", "c"])
+        self.assertEqual(pool.user_info(user_id=USER_ID)["id"], USER_ID)
+        transport.close()
+
+    def test_unauthorized_token_is_removed(self):
+        transport = _FaultyTransport(revoked=["a"])
+        pool = IFAPIPool(["a", "b"], base=self.base, transport=transport)
+        for _ in range(3):
+            self.assertEqual(pool.user_info(user_id=USER_ID)["id"], USER_ID)
+        self.assertEqual(pool.tokens, ["b"])
+        self.assertEqual(pool.stats()["a"]["state"], "revoked")
+        transport.close()
+
+    def test_rate_limits_every_request(self):
+        pool = IFAPIPool(["a"], rate=10, burst=1, base=self.base)
+        start = time.monotonic()
+        posts = pool.tag_posts(tag="meme", limit=500)
+        elapsed = time.monotonic() - start
+        self.assertEqual(len(posts), 500)
+        # Five page requests on one token: four waits of 1 / rate seconds
+        self.assertGreaterEqual(elapsed, 0.35)
+
+
+if __name__ == "__main__":
+    unittest.main()